@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Compare per-entry and batched deduplication throughput during a burst.
+
+Run from the repository root: `python benchmarks/dedup.py [entries] [history]`
+"""
+
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# pylint: disable=wrong-import-position
+from pushlog_lib import (BATCH_SIZE, SCORERS, Unit, process_batch,  # noqa: E402
+                         rapidfuzz_process, should_process_entry)
+
+WORDS = (
+    "error warning connection failed timeout disk space low retry upstream user login "
+    "denied permission socket closed refused database query slow cache miss"
+).split()
+
+
+def burst(count, seed):
+    """Journal entries from a few units, with many near-duplicate messages."""
+    rng = random.Random(seed)
+    templates = [" ".join(rng.choice(WORDS) for _ in range(8)) for _ in range(count // 20 + 1)]
+    return [
+        {
+            "_SYSTEMD_UNIT": f"unit-{rng.randrange(4)}.service",
+            "PRIORITY": 3,
+            "MESSAGE": f"{rng.choice(templates)} id={rng.randrange(100000)}",
+        }
+        for _ in range(count)
+    ]
+
+
+def main(count, history_size):
+    """Time both paths for every available backend and check their verdicts agree."""
+    units = [Unit(re.compile(".*"), [3], [], [])]
+    warmup = burst(history_size, 1)
+    entries = burst(count, 2)
+    print(f"{count} entries, {history_size} warm-up history entries")
+
+    for name, scorer_class in SCORERS.items():
+        if name == "rapidfuzz" and rapidfuzz_process is None:
+            print(f"{name:<12} skipped, not installed")
+            continue
+        scorer = scorer_class()
+
+        history = {}
+        process_batch(warmup, units, 95, history, scorer)
+        started = time.perf_counter()
+        sequential = [should_process_entry(e, units, 95, history, scorer) for e in entries]
+        sequential_time = time.perf_counter() - started
+
+        history = {}
+        process_batch(warmup, units, 95, history, scorer)
+        started = time.perf_counter()
+        batched = []
+        for i in range(0, len(entries), BATCH_SIZE):
+            batched += process_batch(entries[i:i + BATCH_SIZE], units, 95, history, scorer)
+        batched_time = time.perf_counter() - started
+
+        print(
+            f"{name:<12} per-entry {count / sequential_time:>9.0f}/s"
+            f"  batched {count / batched_time:>9.0f}/s"
+            f"  verdicts {'match' if batched == sequential else 'DIFFER'}"
+        )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 1000,
+    )
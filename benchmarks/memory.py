@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Compare memory use of buffered entries and dedup history at 100k items.
+
+Run from the repository root: `python benchmarks/memory.py [count]`
+"""
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pushlog_lib import to_record  # noqa: E402  pylint: disable=wrong-import-position
+
+
+def journal_entry(i):
+    """Build a dict shaped like one returned by systemd.journal.Reader."""
+    return {
+        "_SYSTEMD_UNIT": "test-unit.service",
+        "SYSLOG_IDENTIFIER": "test-process",
+        "__REALTIME_TIMESTAMP": datetime.now(),
+        "__MONOTONIC_TIMESTAMP": (i, "boot-id"),
+        "__CURSOR": f"s=0123456789abcdef;i={i:x};b=0123456789abcdef;m={i:x}",
+        "PRIORITY": 3,
+        "MESSAGE": f"Error {i}: connection to upstream failed",
+        "_PID": 1000 + i,
+        "_UID": 0,
+        "_GID": 0,
+        "_COMM": "test-process",
+        "_EXE": "/usr/bin/test-process",
+        "_CMDLINE": "/usr/bin/test-process --serve",
+        "_CAP_EFFECTIVE": "0",
+        "_HOSTNAME": "localhost",
+        "_BOOT_ID": "0123456789abcdef",
+        "_MACHINE_ID": "0123456789abcdef",
+        "_TRANSPORT": "stdout",
+        "_STREAM_ID": "0123456789abcdef",
+        "_SYSTEMD_CGROUP": "/system.slice/test-unit.service",
+        "_SYSTEMD_SLICE": "system.slice",
+        "_SYSTEMD_INVOCATION_ID": "0123456789abcdef",
+        "SYSLOG_FACILITY": 3,
+    }
+
+
+def rss_kib():
+    """Current resident set size in KiB (Linux only)."""
+    with open("/proc/self/statm", "r", encoding="utf-8") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+def measure(label, build):
+    """Print traced and resident memory held by the result of build()."""
+    gc.collect()
+    rss_before = rss_kib()
+    tracemalloc.start()
+    result = build()
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+    print(f"{label:<32} {traced / 1024:>10.0f} KiB traced {rss_kib() - rss_before:>10} KiB RSS")
+    return result
+
+
+def main(count):
+    """Run all measurements with the given number of items."""
+    print(f"{count} items")
+    held = measure("buffer: journal dicts", lambda: [journal_entry(i) for i in range(count)])
+    del held
+    held = measure("buffer: records", lambda: [to_record(journal_entry(i)) for i in range(count)])
+    del held
+    held = measure(
+        "history: datetime values", lambda: {f"Error {i}": datetime.now() for i in range(count)}
+    )
+    del held
+    held = measure(
+        "history: monotonic floats", lambda: {f"Error {i}": time.monotonic() for i in range(count)}
+    )
+    del held
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
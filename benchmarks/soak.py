@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""End-to-end load and soak harness for the pushlog daemon.
+
+Runs `run_daemon` in a child process against a scripted fake journal and a local
+stand-in for api.pushover.net, then reports sustained throughput, notification
+latency percentiles, RSS growth of the daemon process and lost or duplicate
+notifications. Gate options turn the report into a pass/fail release check.
+
+Run from the repository root, e.g.:
+
+    python benchmarks/soak.py --duration 600 --rate 100 --burst-size 2000 --error-rate 0.05
+"""
+
+import json
+import multiprocessing
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+import click
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# pylint: disable=wrong-import-position
+import systemd.journal  # noqa: E402
+
+import pushlog_lib  # noqa: E402
+
+SEQ_PATTERN = re.compile(r"seq=(\d+) sent=(\d+\.\d+)")
+
+
+class SoakFinished(Exception):
+    """Raised by the fake journal to end run_daemon."""
+
+
+class FakeJournal:  # pylint: disable=too-many-instance-attributes
+    """
+    Scripted stand-in for systemd.journal.Reader. Emits `rate` entries per second,
+    plus `burst_size` entries at once every `burst_every` seconds, for `duration`
+    seconds, then sets `emitted_all`. It stays idle so buffered and queued
+    notifications get delivered, and raises SoakFinished once the driver sets
+    `finish`, or after at most `drain` seconds.
+    """
+
+    def __init__(
+        self, rate, burst_size, burst_every, duration, drain, units, emitted, emitted_all, finish
+    ):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self.rate = rate
+        self.burst_size = burst_size
+        self.burst_every = burst_every
+        self.units = units
+        # Shared with the driver: multiprocessing.Value and Events
+        self.emitted = emitted
+        self.emitted_all = emitted_all
+        self.finish = finish
+        self.started = time.monotonic()
+        self.stop_at = self.started + duration
+        self.finish_at = self.stop_at + drain
+        self.bursts = 0
+        self.seq = 0
+
+    def _due(self):
+        """Number of entries scheduled up to now that have not been emitted yet."""
+        elapsed = min(time.monotonic(), self.stop_at) - self.started
+        scheduled = int(elapsed * self.rate)
+        if self.burst_size and self.burst_every:
+            scheduled += int(elapsed // self.burst_every) * self.burst_size
+        return scheduled - self.seq
+
+    def wait(self, timeout):
+        """Like Reader.wait(), returns APPEND when new entries are due."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if time.monotonic() >= self.finish_at or self.finish.is_set():
+                raise SoakFinished()
+            if self._due() > 0:
+                return systemd.journal.APPEND
+            if time.monotonic() >= self.stop_at:
+                self.emitted_all.set()
+            time.sleep(min(0.01, max(0.0, deadline - time.monotonic())))
+        return systemd.journal.NOP
+
+    def __iter__(self):
+        for _ in range(self._due()):
+            seq = self.seq
+            self.seq += 1
+            self.emitted.value = self.seq
+            yield {
+                "__CURSOR": f"soak;i={seq}",
+                "__REALTIME_TIMESTAMP": datetime.now(),
+                "_SYSTEMD_UNIT": f"soak-{seq % self.units}.service",
+                "SYSLOG_IDENTIFIER": "soak",
+                "PRIORITY": 3,
+                "MESSAGE": f"soak event seq={seq} sent={time.time():.6f}",
+            }
+
+
+class FakePushover(ThreadingMixIn, HTTPServer):  # pylint: disable=too-many-instance-attributes
+    """
+    Local stand-in for api.pushover.net. Injects response latency, server errors and
+    429 responses beyond `rate_limit` requests per second, rejects messages over the
+    API's length limit like the real API, and records every entry it accepted.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency, error_rate, rate_limit, seed=0):
+        super().__init__(("127.0.0.1", 0), FakePushoverHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.window = (0, 0)  # (second, requests in it)
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.too_long = 0
+        self.received = Counter()
+        self.latencies = []
+
+    @property
+    def url(self):
+        """Base URL to configure as pushover.url."""
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def respond(self, body):
+        """Decide the status for a request and record accepted entries."""
+        time.sleep(self.latency)
+        with self.lock:
+            self.requests += 1
+            second = int(time.monotonic())
+            count = self.window[1] + 1 if self.window[0] == second else 1
+            self.window = (second, count)
+            if self.rate_limit and count > self.rate_limit:
+                self.rate_limited += 1
+                return 429
+            if self.random.random() < self.error_rate:
+                self.errors += 1
+                return 500
+
+            now = time.time()
+            message = urllib.parse.parse_qs(body).get("message", [""])[0]
+            if len(message) > pushlog_lib.PUSHOVER_MESSAGE_LIMIT:
+                self.too_long += 1
+                return 400
+            for seq, sent in SEQ_PATTERN.findall(message):
+                self.received[int(seq)] += 1
+                self.latencies.append(now - float(sent))
+            return 200
+
+    def received_all(self, count):
+        """True once the entries 0 to count - 1 have all been accepted."""
+        with self.lock:
+            return len(self.received) >= count
+
+
+class FakePushoverHandler(BaseHTTPRequestHandler):
+    """Request handler for FakePushover."""
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Handle POST /1/messages.json."""
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+        status = self.server.respond(body)
+        payload = json.dumps({"status": 1 if status == 200 else 0}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+def rss_kib(pid):
+    """Resident set size of a process in KiB (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/statm", "r", encoding="utf-8") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (FileNotFoundError, ProcessLookupError):
+        return None
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a sorted list."""
+    if not values:
+        return float("nan")
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run_child(config_path, journal_options, shared):
+    """Child process: run the daemon until the fake journal finishes."""
+    journal = FakeJournal(**shared, **journal_options)
+    try:
+        pushlog_lib.run_daemon(config_path, journal_reader=journal)
+    except SoakFinished:
+        pass
+
+
+@click.command()
+@click.option("--duration", default=120, help="Seconds to emit entries for.")
+@click.option("--rate", default=50.0, help="Steady entries per second.")
+@click.option("--burst-size", default=0, help="Extra entries emitted at once per burst.")
+@click.option("--burst-every", default=30, help="Seconds between bursts.")
+@click.option("--units", default=4, help="Number of distinct systemd units.")
+@click.option("--collect-timeout", default=1, help="collect-timeout of the daemon.")
+@click.option("--drain", default=120, help="Max. seconds to wait for deliveries after emitting.")
+@click.option("--latency", default=0.05, help="Fake Pushover response latency in seconds.")
+@click.option("--error-rate", default=0.0, help="Fraction of requests answered with 500.")
+@click.option("--rate-limit", default=0, help="Requests per second before 429 (0: no limit).")
+@click.option("--outbox/--no-outbox", default=True, help="Enable the durable outbox.")
+@click.option("--sample-every", default=5.0, help="Seconds between RSS samples.")
+@click.option("--max-lost", type=int, help="Gate: maximum lost entries.")
+@click.option("--max-queued", type=int, help="Gate: maximum entries still in the outbox.")
+@click.option("--max-duplicates", type=int, help="Gate: maximum duplicate entries.")
+@click.option("--max-p99", type=float, help="Gate: maximum p99 latency in seconds.")
+@click.option("--max-rss-growth", type=int, help="Gate: maximum RSS growth in KiB.")
+def main(**options):  # pylint: disable=too-many-locals,too-many-statements
+    """Run the soak test and print a report."""
+    server = FakePushover(options["latency"], options["error_rate"], options["rate_limit"])
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = {
+            "collect-timeout": options["collect_timeout"],
+            "fuzzy-threshold": 100,  # every entry is unique, so losses can be counted
+            "pushover": {"token": "soak_token", "user": "soak_user", "url": server.url},
+            "units": [{"match": "soak", "priorities": [3], "include": [], "exclude": []}],
+        }
+        if options["outbox"]:
+            config["outbox"] = os.path.join(temp_dir, "outbox.jsonl")
+        config_path = os.path.join(temp_dir, "config.yaml")
+        with open(config_path, "w", encoding="utf-8") as config_file:
+            yaml.safe_dump(config, config_file)
+
+        journal_options = {
+            key: options[key] for key in ("rate", "burst_size", "burst_every", "units", "drain")
+        }
+        journal_options["duration"] = options["duration"]
+        shared = {
+            "emitted": multiprocessing.Value("l", 0),
+            "emitted_all": multiprocessing.Event(),
+            "finish": multiprocessing.Event(),
+        }
+        child = multiprocessing.Process(
+            target=run_child, args=(config_path, journal_options, shared)
+        )
+        started = time.monotonic()
+        child.start()
+
+        samples = []
+        next_sample = 0.0
+        while child.is_alive():
+            if time.monotonic() - started >= next_sample:
+                rss = rss_kib(child.pid)
+                if rss is not None:
+                    samples.append((time.monotonic() - started, rss))
+                next_sample += options["sample_every"]
+            # Stop the daemon as soon as everything was delivered
+            if shared["emitted_all"].is_set() and server.received_all(shared["emitted"].value):
+                shared["finish"].set()
+            child.join(0.1)
+
+        # Entries the daemon still had queued when the drain time was up
+        queued = set()
+        if options["outbox"]:
+            outbox = pushlog_lib.Outbox(config["outbox"])
+            outbox.file.close()
+            for item in outbox.pending:
+                queued.update(int(seq) for seq, _ in SEQ_PATTERN.findall(item["message"]))
+    server.shutdown()
+
+    received = server.received
+    expected = shared["emitted"].value
+    queued.difference_update(received)
+    lost = sum(1 for seq in range(expected) if seq not in received and seq not in queued)
+    duplicates = sum(count - 1 for count in received.values() if count > 1)
+    latencies = sorted(server.latencies)
+    # Skip the first samples while the interpreter and caches warm up
+    steady = samples[len(samples) // 10:] or samples
+    rss_growth = steady[-1][1] - steady[0][1] if steady else 0
+    rss_minutes = (steady[-1][0] - steady[0][0]) / 60 if len(steady) > 1 else 0
+
+    print(f"emitted       {expected} entries in {options['duration']}s")
+    print(f"delivered     {len(received)} entries ({len(received) / options['duration']:.1f}/s)")
+    print(f"lost          {lost}")
+    print(f"queued        {len(queued)} (undelivered, still in the outbox)")
+    print(f"duplicates    {duplicates}")
+    print(
+        f"requests      {server.requests} ({server.errors} errors, "
+        f"{server.rate_limited} rate limited injected, {server.too_long} rejected as too long)"
+    )
+    print(
+        "latency       "
+        + "  ".join(
+            f"p{int(q * 100)} {percentile(latencies, q):.3f}s" for q in (0.5, 0.9, 0.95, 0.99)
+        )
+        + f"  max {latencies[-1] if latencies else float('nan'):.3f}s"
+    )
+    if samples:
+        print(
+            f"rss           start {samples[0][1]} KiB  end {samples[-1][1]} KiB"
+            f"  max {max(rss for _, rss in samples)} KiB"
+        )
+        print(
+            f"rss growth    {rss_growth} KiB after warm-up"
+            + (f" ({rss_growth / rss_minutes:.1f} KiB/min)" if rss_minutes else "")
+        )
+    if child.exitcode:
+        print(f"daemon exited with {child.exitcode}")
+
+    failed = [
+        name
+        for name, value, limit in (
+            ("lost", lost, options["max_lost"]),
+            ("queued", len(queued), options["max_queued"]),
+            ("duplicates", duplicates, options["max_duplicates"]),
+            ("p99", percentile(latencies, 0.99), options["max_p99"]),
+            ("rss growth", rss_growth, options["max_rss_growth"]),
+        )
+        if limit is not None and not value <= limit
+    ]
+    if failed or child.exitcode:
+        print(f"FAILED: {', '.join(failed) or 'daemon crashed'}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
@@ -17,7 +17,9 @@ python3Packages.buildPythonApplication {
     click
     fuzzywuzzy
     levenshtein
+    numpy
     pyyaml
+    rapidfuzz
     systemd
   ];
 
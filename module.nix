@@ -24,6 +24,16 @@ with lib; let
         type = types.listOf types.str;
         default = [];
       };
+      deduplication-window = mkOption {
+        type = with types; nullOr int;
+        description = "Override the global deduplication window for this unit, 0 disables deduplication";
+        default = null;
+      };
+      fuzzy-threshold = mkOption {
+        type = with types; nullOr int;
+        description = "Override the global fuzzy threshold for this unit";
+        default = null;
+      };
     };
   };
 in {
@@ -48,6 +58,12 @@ in {
       default = null;
     };
 
+    resume = mkOption {
+      type = types.bool;
+      description = "Persist the journal position and, on start, send a digest of entries missed while stopped";
+      default = false;
+    };
+
     settings = {
       collect-timeout = mkOption {
         type = types.int;
@@ -64,6 +80,11 @@ in {
         description = "Use fuzzy matching with the given threshold (similarity in percent) to detect duplicates, set to 100 to disable";
         default = 95;
       };
+      fuzzy-backend = mkOption {
+        type = types.enum ["fuzzywuzzy" "rapidfuzz"];
+        description = "Fuzzy matching backend, rapidfuzz scores bursts in batches on all CPU cores";
+        default = "fuzzywuzzy";
+      };
       title = mkOption {
         type = with types; nullOr str;
         description = "Optional title to use for all Pushover notifications";
@@ -86,10 +107,59 @@ in {
           }
         '';
       };
+      outbox = mkOption {
+        type = with types; nullOr str;
+        description = "Optional file to queue notifications in until Pushover accepted them, its directory is made writable for the service";
+        default = null;
+        example = "/var/lib/pushlog/outbox.jsonl";
+      };
+      control-socket = mkOption {
+        type = with types; nullOr str;
+        description = "Optional Unix socket for runtime introspection and profiling";
+        default = null;
+        example = "/run/pushlog/control.sock";
+      };
+      profile-dir = mkOption {
+        type = with types; nullOr str;
+        description = "Directory for CPU and allocation profiles requested via the control socket, the state directory /var/lib/pushlog is writable";
+        default = null;
+        example = "/var/lib/pushlog";
+      };
+      sources = mkOption {
+        type = with types; listOf (attrsOf anything);
+        description = "Optional journals to follow instead of the local system journal, each with `directory` or `files` and an optional `name`";
+        default = [];
+        example = literalExpression ''
+          [
+            { name = "web1"; directory = "/var/log/journal/remote/web1"; }
+            { name = "db1"; files = ["/srv/journals/db1.journal"]; }
+          ]
+        '';
+      };
+      metrics-file = mkOption {
+        type = with types; nullOr str;
+        description = "Optional path to write alert latency histograms to, in Prometheus text format, its directory is made writable for the service";
+        default = null;
+      };
+      slow-threshold = mkOption {
+        type = with types; nullOr number;
+        description = "Optional end-to-end latency in seconds above which entries are written to the slow log";
+        default = null;
+      };
+      slow-log = mkOption {
+        type = with types; nullOr str;
+        description = "Optional file for slow entries as JSON lines, defaults to stderr, its directory is made writable for the service";
+        default = null;
+      };
       units = mkOption {
         type = types.listOf unitType;
         description = "List of units to care about";
       };
+      profiles = mkOption {
+        type = with types; listOf (attrsOf anything);
+        description = "Optional notification profiles, each overriding any of the settings above plus `name` and `pushover`";
+        default = [];
+      };
     };
   };
 
@@ -98,6 +168,12 @@ in {
     (let
       format = pkgs.formats.yaml {};
       configFile = format.generate "pushlog.yaml" cfg.settings;
+      # Files written outside the state directory, read-only under ProtectSystem otherwise
+      writtenFiles = filter (path: path != null) [
+        cfg.settings.metrics-file
+        cfg.settings.slow-log
+        cfg.settings.outbox
+      ];
     in {
       systemd.services.pushlog = {
         description = "Pushlog journal forwarder";
@@ -106,7 +182,9 @@ in {
         wantedBy = ["multi-user.target"];
         serviceConfig =
           {
-            ExecStart = "${cfg.package}/bin/pushlog --config ${configFile}";
+            ExecStart =
+              "${cfg.package}/bin/pushlog --config ${configFile}"
+              + optionalString cfg.resume " --cursor-file /var/lib/pushlog/cursor";
             Type = "simple";
             Restart = "always";
             RestartSec = "5s";
@@ -128,13 +206,22 @@ in {
             ProtectKernelTunables = true;
             ProtectProc = "noaccess";
             ProtectSystem = "strict";
-            RestrictAddressFamilies = ["AF_INET" "AF_INET6"];
+            RestrictAddressFamilies = ["AF_INET" "AF_INET6"] ++ optional (cfg.settings.control-socket != null) "AF_UNIX";
             RestrictNamespaces = true;
             RestrictRealtime = true;
             RestrictSUIDSGID = true;
             SystemCallFilter = "~@aio @chown @clock @cpu-emulation @debug @keyring @ipc @module @mount @obsolete @raw-io @reboot @setuid @swap @privileged @resources";
             UMask = "0077";
           }
+          // optionalAttrs (cfg.resume || cfg.settings.outbox != null || cfg.settings.profile-dir != null) {
+            StateDirectory = "pushlog";
+          }
+          // optionalAttrs (cfg.settings.control-socket != null) {
+            RuntimeDirectory = "pushlog";
+          }
+          // optionalAttrs (writtenFiles != []) {
+            ReadWritePaths = unique (map dirOf writtenFiles);
+          }
           // optionalAttrs (cfg.environmentFile != null) {
             EnvironmentFile = cfg.environmentFile;
           };
@@ -1,63 +1,474 @@
 #!/usr/bin/env python3
 """Library for monitoring systemd journal entries and sending Pushover notifications."""
+# pylint: disable=too-many-lines
 
 import http.client
+import json
 import os
+import queue
 import re
+import resource
+import select
+import signal
+import socketserver
 import sys
+import tempfile
+import threading
+import time
+import tracemalloc
 import urllib
-from collections import namedtuple
+from bisect import bisect_left
+from collections import Counter, deque, namedtuple
 from datetime import datetime, timedelta
+from itertools import islice
 
 import click
 import systemd.journal
 import yaml
-from fuzzywuzzy import process
+from fuzzywuzzy import process, utils
 
-Unit = namedtuple("Unit", ["match", "priorities", "include_regexs", "exclude_regexs"])
+try:
+    import numpy
+    from rapidfuzz import fuzz as rapidfuzz_fuzz
+    from rapidfuzz import process as rapidfuzz_process
+    from rapidfuzz import utils as rapidfuzz_utils
+except ImportError:  # optional, see the `fast` extra
+    rapidfuzz_process = None
+
+Unit = namedtuple(
+    "Unit",
+    [
+        "match",
+        "priorities",
+        "include_regexs",
+        "exclude_regexs",
+        "deduplication_window",
+        "fuzzy_threshold",
+    ],
+)
+# Per-unit deduplication settings are optional, None falls back to the global setting
+Unit.__new__.__defaults__ = (None, None)
+# Compact, tuple-backed copy of the few journal fields pushlog actually uses
+Record = namedtuple(
+    "Record",
+    [
+        "unit",
+        "identifier",
+        "timestamp",
+        "priority",
+        "message",
+        "host",
+        "lag",
+        "filter_time",
+        "accepted",
+    ],
+)
 number_stripper = str.maketrans("", "", "0123456789")
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300)  # [s]
+LATENCY_STAGES = ("journal_lag", "filter", "batch_wait", "send", "total")
+DIGEST_TOP_MESSAGES = 10
+DIGEST_LINE_LIMIT = 160  # [characters], longer digest lines are cut
+BATCH_SIZE = 1000  # max. entries drained from the journal per dedup step
+SCORE_CHUNK_SIZE = 128  # queries scored per rapidfuzz matrix, bounds its memory
+PUSHOVER_URL = "https://api.pushover.net:443"
+PUSHOVER_MESSAGE_LIMIT = 1024  # [characters]
+PUSHOVER_TIMEOUT = 10  # [s]
+OUTBOX_MAX_BACKOFF = 300  # [s]
+OUTBOX_DRAIN_BUDGET = 10  # max. requests per drain, bounds the time away from the journal
+OUTBOX_COMPACT_SIZE = 64 * 1024  # [bytes], rewrite the outbox file when it grows beyond
+SNAPSHOT_TOP_ENTRIES = 10
+PROFILER_INTERVAL = 0.005  # [s] between stack samples
+CAPTURE_MAX_SECONDS = 3600  # longest profile or tracemalloc capture
+SOURCE_FIELD = "_PUSHLOG_SOURCE"  # added to entries read from configured sources
+source_name_pattern = re.compile(r"[A-Za-z0-9_@-][A-Za-z0-9_.@-]*")  # usable as file suffix
+
+
+def parse_units(units_config):
+    """Parse a `units` list into Unit tuples."""
+    units = []
+    # Pre-compile regular expressions for better performance
+    for u in units_config:
+        include_regexs = [re.compile(regex) for regex in u["include"]]
+        exclude_regexs = [re.compile(regex) for regex in u["exclude"]]
+        units.append(
+            Unit(
+                re.compile(u["match"]),
+                u["priorities"],
+                include_regexs,
+                exclude_regexs,
+                u.get("deduplication-window"),  # [min.]
+                u.get("fuzzy-threshold"),  # [%]
+            )
+        )
+    return units
+
+
+def parse_sources(sources_config):
+    """
+    Parse a `sources` list. Names default to the journal directory name, they must be
+    unique and usable as a cursor file suffix (see cursor_path).
+    """
+    sources = []
+    for i, source in enumerate(sources_config or []):
+        directory = source.get("directory")
+        files = source.get("files")
+        name = str(
+            source.get("name") or os.path.basename(os.path.normpath(directory or f"source-{i}"))
+        )
+        if bool(directory) == bool(files):
+            error = "set either directory or files"
+        elif not source_name_pattern.fullmatch(name) or name.endswith(".tmp"):
+            error = "name may only contain letters, digits and _.@- and not end in .tmp"
+        elif any(other["name"] == name for other in sources):
+            error = "name is not unique, set distinct names"
+        else:
+            sources.append({"name": name, "directory": directory, "files": files})
+            continue
+        print(f"Invalid source {name!r}: {error}. Aborting.", file=sys.stderr)
+        sys.exit(1)
+    return sources
+
+
+def parse_profile(config):
+    """Parse the notification rule settings shared by the top level and profiles."""
+    return {
+        "units": parse_units(config.get("units", [])),
+        "collect_timeout": config.get("collect-timeout", 5),  # [s]
+        "deduplication_window": config.get("deduplication-window", 30),  # [min.]
+        "fuzzy_threshold": config.get("fuzzy-threshold", 92),  # [%]
+        "pushover": config.get("pushover", {}),
+        "title": config.get("title"),
+        "priority_map": config.get("priority-map", {}),
+    }
 
 
 def load_config(config_path):
-    """Load and parse the YAML configuration file."""
+    """
+    Load and parse the YAML configuration file.
+    Each entry in `profiles` inherits all top-level settings it does not override,
+    without `profiles` the top level is the only profile. Profile names must be unique.
+    """
     with open(config_path, "r", encoding="utf-8") as yaml_file:
         config = yaml.safe_load(yaml_file)
-        units = []
-        # Pre-compile regular expressions for better performance
-        for u in config.get("units", []):
-            include_regexs = [re.compile(regex) for regex in u["include"]]
-            exclude_regexs = [re.compile(regex) for regex in u["exclude"]]
-            units.append(
-                Unit(
-                    re.compile(u["match"]),
-                    u["priorities"],
-                    include_regexs,
-                    exclude_regexs,
-                )
+
+    result = parse_profile(config)
+    profiles = []
+    for i, profile in enumerate(config.get("profiles") or []):
+        profile_config = parse_profile(dict(config, **profile))
+        # Pushover settings are merged with the top level ones later, see run_daemon
+        profile_config["pushover"] = profile.get("pushover", {})
+        profile_config["name"] = profile.get("name", f"profile-{i}")
+        # Queued notifications are routed to the Pushover settings by profile name
+        if any(other["name"] == profile_config["name"] for other in profiles):
+            print(
+                f"Invalid profile {profile_config['name']!r}: name is not unique, set distinct "
+                "names. Aborting.",
+                file=sys.stderr,
             )
+            sys.exit(1)
+        profiles.append(profile_config)
+    if not profiles:
+        profiles.append(dict(result, name="default", pushover={}))
 
-        collect_timeout = config.get("collect-timeout", 5)  # [s]
-        deduplication_window = config.get("deduplication-window", 30)  # [min.]
-        fuzzy_threshold = config.get("fuzzy-threshold", 92)  # [%]
-        pushover = config.get("pushover", {})
-        title = config.get("title")
-        priority_map = config.get("priority-map", {})
+    result.update(
+        {
+            "profiles": profiles,
+            "fuzzy_backend": config.get("fuzzy-backend", "fuzzywuzzy"),
+            "metrics_file": config.get("metrics-file"),
+            "slow_threshold": config.get("slow-threshold"),  # [s]
+            "slow_log": config.get("slow-log"),
+            "outbox": config.get("outbox"),
+            "outbox_max_size": config.get("outbox-max-size", 1024),  # [KiB]
+            "outbox_retention": config.get("outbox-retention", 1440),  # [min.]
+            "outbox_interval": config.get("outbox-interval", 1),  # [s]
+            "sources": parse_sources(config.get("sources")),
+            "control_socket": config.get("control-socket"),
+            "profile_dir": config.get("profile-dir") or tempfile.gettempdir(),
+        }
+    )
+    return result
 
-    return {
-        "units": units,
-        "collect_timeout": collect_timeout,
-        "deduplication_window": deduplication_window,
-        "fuzzy_threshold": fuzzy_threshold,
-        "pushover": pushover,
-        "title": title,
-        "priority_map": priority_map,
-    }
 
+class Scorer:
+    """
+    Fuzzy scorer backend. Subclasses score number-stripped messages with WRatio (0-100)
+    and must implement scorable, best_match and match_new.
+    """
+
+    def scorable(self, query):
+        """False if the scorer's preprocessing reduces query to nothing (it scores 0)."""
+        raise NotImplementedError
+
+    def best_match(self, query, choices):
+        """Return (choice, score) of the most similar choice, or None if there are none."""
+        raise NotImplementedError
+
+    def match_new(self, queries, history, score_cutoff=0):
+        """
+        (choice, score) of the best match of each distinct query, not found in history,
+        against history plus all preceding queries, (None, 0) if there is none.
+        Scores below score_cutoff may be reported as (None, 0).
+        """
+        raise NotImplementedError
+
+    def batch_best_matches(self, queries, history, score_cutoff=0):
+        """
+        (choice, score) of the best match of each query against history plus all
+        preceding queries, as if they had been looked up and added to history one by one.
+        """
+        history = list(history)
+        seen = set(history)
+        new = []
+        for query in queries:
+            if query not in seen:
+                seen.add(query)
+                new.append(query)
+        new_matches = dict(zip(new, self.match_new(new, history, score_cutoff)))
+
+        best = []
+        seen = set(history)
+        for query in queries:
+            if query in seen:
+                # Exact repeat, identical strings always score 100 unless unscorable
+                best.append((query, 100) if self.scorable(query) else (None, 0))
+            else:
+                best.append(new_matches[query])
+                seen.add(query)
+        return best
+
+
+class FuzzywuzzyScorer(Scorer):
+    """Default backend, scores one pair at a time with fuzzywuzzy."""
+
+    def scorable(self, query):
+        return bool(utils.full_process(query, force_ascii=True))
 
-def should_process_entry(entry, config_units, fuzzy_threshold, history_buffer):
+    def best_match(self, query, choices):
+        matches = process.extract(query, choices, limit=1)
+        return matches[0] if matches else None
+
+    def match_new(self, queries, history, score_cutoff=0):
+        candidates = list(history)
+        best = []
+        for query in queries:
+            matches = process.extractWithoutOrder(query, candidates, score_cutoff=score_cutoff)
+            best.append(max(matches, key=lambda match: match[1], default=(None, 0)))
+            candidates.append(query)
+        return best
+
+
+class RapidfuzzScorer(Scorer):
+    """Optional backend scoring whole matrices natively on all CPU cores with rapidfuzz."""
+
+    def __init__(self, workers=-1):
+        if rapidfuzz_process is None:
+            raise ImportError("rapidfuzz is not installed, install pushlog[fast]")
+        self.workers = workers
+
+    def _matrix(self, queries, choices, score_cutoff=0):
+        # Integer scores, like fuzzywuzzy's, at a quarter of the memory of float32
+        return rapidfuzz_process.cdist(
+            queries,
+            choices,
+            scorer=rapidfuzz_fuzz.WRatio,
+            processor=rapidfuzz_utils.default_process,
+            score_cutoff=score_cutoff,
+            dtype=numpy.uint8,
+            workers=self.workers,
+        )
+
+    def scorable(self, query):
+        return bool(rapidfuzz_utils.default_process(query))
+
+    def best_match(self, query, choices):
+        choices = list(choices)
+        if not choices:
+            return None
+        row = self._matrix([query], choices)[0]
+        index = int(row.argmax())
+        return choices[index], float(row[index])
+
+    def match_new(self, queries, history, score_cutoff=0):
+        choices = list(history) + list(queries)
+        best = []
+        # Score in chunks of queries, each only against the choices preceding its last query
+        for start in range(0, len(queries), SCORE_CHUNK_SIZE):
+            chunk = queries[start:start + SCORE_CHUNK_SIZE]
+            end = len(choices) - len(queries) + start + len(chunk) - 1
+            matrix = self._matrix(chunk, choices[:end], score_cutoff) if end else None
+            for i in range(len(chunk)):
+                limit = end - len(chunk) + 1 + i
+                if not limit:
+                    best.append((None, 0))
+                    continue
+                index = int(matrix[i, :limit].argmax())
+                score = int(matrix[i, index])
+                best.append((choices[index], score) if score else (None, 0))
+        return best
+
+
+SCORERS = {"fuzzywuzzy": FuzzywuzzyScorer, "rapidfuzz": RapidfuzzScorer}
+default_scorer = FuzzywuzzyScorer()
+
+
+def to_record(entry, lag=0.0, filter_time=0.0, accepted=None):
+    """Reduce a journal entry dict to a compact Record."""
+    # Only name the host when following several journals
+    source = entry.get(SOURCE_FIELD)
+    return Record(
+        entry.get("_SYSTEMD_UNIT", ""),
+        entry.get("SYSLOG_IDENTIFIER", ""),
+        entry.get("__REALTIME_TIMESTAMP"),
+        entry.get("PRIORITY"),
+        entry.get("MESSAGE", ""),
+        entry.get("_HOSTNAME", source) if source else "",
+        lag,
+        filter_time,
+        time.monotonic() if accepted is None else accepted,
+    )
+
+
+def history_key(entry):
     """
-    Determine if an entry should be processed based on configuration rules.
-    Returns True if the entry should be processed, False otherwise.
+    History shard of an entry: its unit name, or (source, unit name) for entries
+    read from configured sources, so each source is deduplicated separately.
+    """
+    source = entry.get(SOURCE_FIELD)
+    unit_name = entry.get("_SYSTEMD_UNIT", "")
+    return (source, unit_name) if source else unit_name
+
+
+def shard_unit(key):
+    """Unit name of a history shard key."""
+    return key[1] if isinstance(key, tuple) else key
+
+
+def shard_label(key):
+    """Printable name of a history shard key."""
+    return f"{key[1]}@{key[0]}" if isinstance(key, tuple) else key
+
+
+def journal_lag(entry):
+    """Seconds between an entry being written to the journal and now."""
+    timestamp = entry.get("__REALTIME_TIMESTAMP")
+    if not isinstance(timestamp, datetime):
+        return 0.0
+    return max(0.0, time.time() - timestamp.timestamp())
+
+
+class Histogram:
+    """Cumulative histogram with fixed bucket bounds, in Prometheus style."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """Add a single observation."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Return (upper bound, cumulative count) pairs, ending with +Inf."""
+        total = 0
+        result = []
+        for bound, count in zip(list(self.bounds) + ["+Inf"], self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class LatencyTracker:
+    """
+    Per-stage alert latency: journal lag, filter time, batch wait and send time.
+    Entries slower than slow_threshold end to end are written to a JSON lines slow log.
+    """
+
+    def __init__(self, slow_threshold=None, slow_log=None):
+        self.histograms = {stage: Histogram() for stage in LATENCY_STAGES}
+        self.journal_lag = 0.0
+        self.slow_threshold = slow_threshold
+        self.slow_log = slow_log
+
+    def record_batch(self, records, flushed, send_time):
+        """Account for a batch of records that was flushed at `flushed` (monotonic)."""
+        slow = []
+        for record in records:
+            batch_wait = max(0.0, flushed - record.accepted)
+            total = record.lag + record.filter_time + batch_wait + send_time
+            for stage, value in zip(
+                LATENCY_STAGES, (record.lag, record.filter_time, batch_wait, send_time, total)
+            ):
+                self.histograms[stage].observe(value)
+            if self.slow_threshold is not None and total >= self.slow_threshold:
+                slow.append(
+                    {
+                        "timestamp": str(record.timestamp),
+                        "unit": record.unit,
+                        "identifier": record.identifier,
+                        "message": record.message,
+                        "journal_lag": round(record.lag, 6),
+                        "filter": round(record.filter_time, 6),
+                        "batch_wait": round(batch_wait, 6),
+                        "send": round(send_time, 6),
+                        "total": round(total, 6),
+                    }
+                )
+        if slow:
+            self.write_slow_log(slow)
+
+    def write_slow_log(self, items):
+        """Append slow entries as JSON lines to the slow log, or stderr if unset."""
+        lines = "".join(json.dumps(item) + "\n" for item in items)
+        if self.slow_log:
+            try:
+                with open(self.slow_log, "a", encoding="utf-8") as slow_file:
+                    slow_file.write(lines)
+            except OSError as e:
+                print(f"Error writing slow log: {e}", file=sys.stderr)
+        else:
+            sys.stderr.write(lines)
+
+    def render_metrics(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP pushlog_latency_seconds Alert latency per stage for delivered entries.",
+            "# TYPE pushlog_latency_seconds histogram",
+        ]
+        for stage, histogram in self.histograms.items():
+            for bound, count in histogram.cumulative():
+                lines.append(
+                    f'pushlog_latency_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}'
+                )
+            lines.append(f'pushlog_latency_seconds_sum{{stage="{stage}"}} {histogram.sum}')
+            lines.append(f'pushlog_latency_seconds_count{{stage="{stage}"}} {histogram.count}')
+        lines += [
+            "# HELP pushlog_journal_lag_seconds Age of the newest entry read from the journal.",
+            "# TYPE pushlog_journal_lag_seconds gauge",
+            f"pushlog_journal_lag_seconds {self.journal_lag}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write_metrics(self, metrics_file):
+        """Atomically replace metrics_file, e.g. for the node_exporter textfile collector."""
+        temp_file = f"{metrics_file}.tmp"
+        try:
+            with open(temp_file, "w", encoding="utf-8") as prom_file:
+                prom_file.write(self.render_metrics())
+            os.replace(temp_file, metrics_file)
+        except OSError as e:
+            print(f"Error writing metrics: {e}", file=sys.stderr)
+
+
+def match_entry(entry, config_units):
+    """
+    Apply the unit, priority and include/exclude rules to an entry.
+    Returns the matching Unit, or None if the entry is filtered out.
     """
     # match the _SYSTEMD_UNIT against units' match fields
     unit = next(
@@ -65,45 +476,136 @@ def should_process_entry(entry, config_units, fuzzy_threshold, history_buffer):
         None,
     )
     if not unit:
-        return False
+        return None
 
     if not "PRIORITY" in entry or not entry["PRIORITY"] in unit.priorities:
-        return False
+        return None
 
     message = entry.get("MESSAGE", "")
     if any(regex.search(message) for regex in unit.exclude_regexs):
-        return False
+        return None
     if len(unit.include_regexs) > 0:
         # Pass all messages if no include filter is specified
         if not any(regex.search(message) for regex in unit.include_regexs):
-            return False
+            return None
 
-    if fuzzy_threshold < 100:
-        # Check against history buffer (fuzzy match), strip numbers first
-        stripped = message.translate(number_stripper)
-        matches = process.extract(stripped, list(history_buffer.keys()), limit=1)
-        history_buffer[stripped] = datetime.now()
-        if (
-            len(matches) > 0 and matches[0][1] >= fuzzy_threshold  # fuzzy matching threshold in %
-        ):
+    return unit
+
+
+def unit_fuzzy_threshold(unit, fuzzy_threshold):
+    """
+    Effective fuzzy threshold for a unit, honouring its overrides.
+    Returns 100 (disabled) if the unit's deduplication window is 0.
+    """
+    if unit.deduplication_window == 0:
+        return 100
+    if unit.fuzzy_threshold is not None:
+        return unit.fuzzy_threshold
+    return fuzzy_threshold
+
+
+def find_duplicate(stripped, fuzzy_threshold, history_buffer, scorer=None):
+    """
+    Look up a number-stripped message in the history buffer (fuzzy match) and record it.
+    Returns the similar history key if the message is a duplicate, None otherwise.
+    """
+    match = (scorer or default_scorer).best_match(stripped, history_buffer.keys())
+    history_buffer[stripped] = time.monotonic()
+    if match is not None and match[1] >= fuzzy_threshold:  # fuzzy matching threshold in %
+        return match[0]
+    return None
+
+
+def should_process_entry(
+    entry, config_units, fuzzy_threshold, history_buffer, scorer=None
+):
+    """
+    Determine if an entry should be processed based on configuration rules.
+    history_buffer holds one history shard per systemd unit name.
+    Returns True if the entry should be processed, False otherwise.
+    """
+    unit = match_entry(entry, config_units)
+    if unit is None:
+        return False
+
+    threshold = unit_fuzzy_threshold(unit, fuzzy_threshold)
+    if threshold < 100:
+        # Check against the unit's history (fuzzy match), strip numbers first
+        shard = history_buffer.setdefault(history_key(entry), {})
+        stripped = entry.get("MESSAGE", "").translate(number_stripper)
+        if find_duplicate(stripped, threshold, shard, scorer) is not None:
             return False
 
     # Pass
     return True
 
 
-def format_message(message):
-    """Format a journal entry for display in a notification."""
-    unit_name = message.get("_SYSTEMD_UNIT", "")
-    syslog_identifier = message.get("SYSLOG_IDENTIFIER", "")
-    timestamp = message.get("__REALTIME_TIMESTAMP")
-    message_text = message.get("MESSAGE", "")
+def find_duplicates(
+    entries, config_units, fuzzy_threshold, history_buffer, scorer=None, hits=None
+):  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+    """
+    Batched equivalent of find_duplicate for each entry matching a unit, in order.
+    Each unit's messages are scored against its history and each other in one step.
+    If hits (a Counter) is given, entries matching each unit's rules are counted by pattern.
+    Returns (index, history shard, stripped message, similar history key or None) for each
+    matching entry. Without deduplication, the stripped message is None.
+    """
+    matches = {}  # index -> (history shard, stripped message, duplicate)
+    pending = {}  # history shard -> (threshold, [(index, stripped message)])
+    for i, entry in enumerate(entries):
+        unit = match_entry(entry, config_units)
+        if unit is None:
+            continue
+        if hits is not None:
+            hits[unit.match.pattern] += 1
+        threshold = unit_fuzzy_threshold(unit, fuzzy_threshold)
+        if threshold < 100:
+            stripped = entry.get("MESSAGE", "").translate(number_stripper)
+            pending.setdefault(history_key(entry), (threshold, []))[1].append((i, stripped))
+        else:
+            matches[i] = (history_key(entry), None, None)
+
+    for key, (threshold, items) in pending.items():
+        shard = history_buffer.setdefault(key, {})
+        queries = [stripped for _, stripped in items]
+        best = (scorer or default_scorer).batch_best_matches(queries, shard.keys(), threshold)
+        now = time.monotonic()
+        for (i, stripped), (match, score) in zip(items, best):
+            matches[i] = (key, stripped, match if score >= threshold else None)
+            shard[stripped] = now
+
+    return [(i, *matches[i]) for i in sorted(matches)]
+
+
+def process_batch(
+    entries, config_units, fuzzy_threshold, history_buffer, scorer=None, hits=None
+):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """
+    Batched equivalent of calling should_process_entry on each entry in order.
+    Returns a list of booleans, True for entries that should be processed.
+    """
+    verdicts = [False] * len(entries)
+    for i, _, _, duplicate in find_duplicates(
+        entries, config_units, fuzzy_threshold, history_buffer, scorer, hits
+    ):
+        verdicts[i] = duplicate is None
+    return verdicts
 
-    result = f"{timestamp} {unit_name}[{syslog_identifier}]: {message_text}"
+
+def format_message(record):
+    """Format a journal Record for display in a notification."""
+    host = f" {record.host}" if record.host else ""
+    result = f"{record.timestamp}{host} {record.unit}[{record.identifier}]: {record.message}"
 
     return result
 
 
+def highest_priority(records):
+    """Return the most urgent (numerically lowest) journald priority among records."""
+    priorities = [int(record.priority) for record in records if record.priority is not None]
+    return min(priorities) if priorities else None
+
+
 def send_collected_messages(entries_buffer, pushover, notification_sender=None):
     """Format and send a collection of messages as a notification."""
     if entries_buffer:
@@ -111,21 +613,40 @@ def send_collected_messages(entries_buffer, pushover, notification_sender=None):
         full_text = "\n".join(formatted_messages)
 
         # Determine the highest priority message in the batch
-        highest_priority = None
-        for entry in entries_buffer:
-            if "PRIORITY" in entry:
-                entry_priority = int(entry["PRIORITY"])
-                if highest_priority is None or entry_priority < highest_priority:
-                    highest_priority = entry_priority
+        priority = highest_priority(entries_buffer)
 
         if notification_sender:
-            notification_sender(full_text, pushover, highest_priority)
+            notification_sender(full_text, pushover, priority)
         else:
-            send_pushover_notification(full_text, pushover, highest_priority)
+            send_pushover_notification(full_text, pushover, priority)
+
+
+def split_message(lines, limit=PUSHOVER_MESSAGE_LIMIT):
+    """
+    Join lines into message parts of at most limit characters, lines longer than limit
+    are cut. Returns (part, [indices of the lines starting in it]) tuples.
+    """
+    parts = []
+    pieces, indices, length = [], [], -1
+    for i, line in enumerate(lines):
+        for start in range(0, max(len(line), 1), limit):
+            piece = line[start:start + limit]
+            if pieces and length + 1 + len(piece) > limit:
+                parts.append(("\n".join(pieces), indices))
+                pieces, indices, length = [], [], -1
+            if start == 0:
+                indices.append(i)
+            pieces.append(piece)
+            length += 1 + len(piece)
+    parts.append(("\n".join(pieces), indices))
+    return parts
 
 
 def send_pushover_notification(message, pushover, journald_priority=None):
-    """Send a notification to Pushover."""
+    """
+    Send a notification to Pushover.
+    Returns the HTTP status code, or None if the request failed.
+    """
     params = {
         "token": pushover.get("token"),
         "user": pushover.get("user"),
@@ -144,10 +665,15 @@ def send_pushover_notification(message, pushover, journald_priority=None):
         params["priority"] = pushover["priority_map"][str(journald_priority)]
 
     try:
-        conn = http.client.HTTPSConnection("api.pushover.net:443")
+        # The API endpoint can be overridden, e.g. for a local test server
+        url = urllib.parse.urlsplit(pushover.get("url", PUSHOVER_URL))
+        if url.scheme == "http":
+            conn = http.client.HTTPConnection(url.netloc, timeout=PUSHOVER_TIMEOUT)
+        else:
+            conn = http.client.HTTPSConnection(url.netloc, timeout=PUSHOVER_TIMEOUT)
         conn.request(
             "POST",
-            "/1/messages.json",
+            url.path.rstrip("/") + "/1/messages.json",
             urllib.parse.urlencode(params),
             {"Content-type": "application/x-www-form-urlencoded"},
         )
@@ -157,79 +683,973 @@ def send_pushover_notification(message, pushover, journald_priority=None):
                 f"Pushover API error: {response.status} {response.reason}",
                 file=sys.stderr,
             )
+        return response.status
     except Exception as e:  # pylint: disable=broad-exception-caught
         print(f"Error sending notification to Pushover: {e}", file=sys.stderr)
+        return None
+
+
+class Outbox:  # pylint: disable=too-many-instance-attributes
+    """
+    Durable, append-only queue of notifications in a JSON lines file.
+    Notifications are split to fit the API message limit and removed (acknowledged) only
+    after Pushover accepted them. Queued notifications of the same profile are coalesced
+    up to the limit. Delivery backs off exponentially while it fails, then the backlog
+    queued until the failure is sent at most once per interval. Other notifications are
+    sent right away.
+    """
+
+    def __init__(self, path, max_size=1024, retention=1440, interval=1):
+        self.path = path
+        self.max_bytes = max_size * 1024
+        self.retention = retention * 60  # [s]
+        self.interval = interval
+        self.pending = deque()
+        self.pending_bytes = 0
+        self.next_id = 0
+        self.next_send = 0.0
+        self.backoff = 0.0
+        self.retry_backlog = -1  # id of the last notification queued when delivery failed
+        # Records and flush time of notifications queued by this process, by id
+        self.timings = {}
+        self.file = None
+        self.file_bytes = 0
+        self._load()
+        self._compact()
+
+    def _load(self):
+        items = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as outbox_file:
+                for line in outbox_file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn write after a crash
+                    if "ack" in record:
+                        for item_id in record["ack"]:
+                            items.pop(item_id, None)
+                    else:
+                        items[record["id"]] = record
+        except FileNotFoundError:
+            pass
+        for item_id in sorted(items):
+            self._push(items[item_id])
+        if items:
+            self.next_id = max(items) + 1
+
+    def _push(self, item):
+        item["size"] = len(json.dumps(item)) + 1
+        self.pending.append(item)
+        self.pending_bytes += item["size"]
+
+    def _pop(self):
+        item = self.pending.popleft()
+        self.pending_bytes -= item["size"]
+        return item
+
+    @staticmethod
+    def _lines(records):
+        return "".join(
+            json.dumps({k: v for k, v in record.items() if k != "size"}) + "\n"
+            for record in records
+        )
+
+    def _write(self, records):
+        lines = self._lines(records)
+        self.file.write(lines)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file_bytes += len(lines)
+
+    def _compact(self):
+        """Rewrite the file with only the pending notifications."""
+        lines = self._lines(self.pending)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as temp_file:
+            temp_file.write(lines)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, self.path)
+        if self.file is not None:
+            self.file.close()
+        self.file = open(self.path, "a", encoding="utf-8")  # pylint: disable=consider-using-with
+        self.file_bytes = len(lines)
+
+    def _ack(self, items):
+        for item in items:
+            self.timings.pop(item["id"], None)
+        try:
+            self._write([{"ack": [item["id"] for item in items]}])
+            if self.file_bytes > max(2 * self.pending_bytes, OUTBOX_COMPACT_SIZE):
+                self._compact()
+        except OSError as e:
+            # Only risks sending these again after a restart
+            print(f"Error writing outbox acknowledgement: {e}", file=sys.stderr)
+
+    def enqueue(
+        self, profile, message, priority=None, records=None, flushed=None
+    ):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """
+        Durably queue a notification for the given profile, split at line boundaries into
+        parts that fit the API message limit. message is the text or a list of its lines.
+        If records (one per line) and their flush time (monotonic) are given, their
+        latency is recorded on delivery.
+        Returns False if the outbox could not be written, e.g. with a full disk.
+        """
+        lines = message.split("\n") if isinstance(message, str) else message
+        items = []
+        for part, indices in split_message(lines):
+            items.append(
+                {
+                    "id": self.next_id + len(items),
+                    "time": time.time(),
+                    "profile": profile,
+                    "message": part,
+                    "priority": priority,
+                }
+            )
+            if records is not None and indices:
+                self.timings[items[-1]["id"]] = ([records[i] for i in indices], flushed)
+        try:
+            self._write(items)
+        except OSError as e:
+            print(f"Error writing outbox, sending directly: {e}", file=sys.stderr)
+            for item in items:
+                self.timings.pop(item["id"], None)
+            return False
+        self.next_id += len(items)
+        for item in items:
+            self._push(item)
+
+        dropped = []
+        while self.pending_bytes > self.max_bytes and len(self.pending) > 1:
+            dropped.append(self._pop())
+        if dropped:
+            print(f"Outbox full, dropped {len(dropped)} oldest notifications", file=sys.stderr)
+            self._ack(dropped)
+        return True
+
+    def sender(self, profile, fallback=None):
+        """
+        Return a notification sender that queues into the outbox for profile, or sends
+        with fallback (default: send_pushover_notification) if the outbox is not writable.
+        """
+
+        def send(message, pushover, priority=None):
+            if not self.enqueue(profile, message, priority):
+                (fallback or send_pushover_notification)(message, pushover, priority)
+
+        return send
+
+    def _expire(self):
+        cutoff = time.time() - self.retention
+        expired = []
+        while self.pending and self.pending[0]["time"] < cutoff:
+            expired.append(self._pop())
+        if expired:
+            print(
+                f"Outbox retention exceeded, dropped {len(expired)} notifications",
+                file=sys.stderr,
+            )
+            self._ack(expired)
+
+    def _coalesce(self):
+        """Take the head of the queue plus following notifications of the same profile."""
+        items = [self._pop()]
+        length = len(items[0]["message"])
+        while (
+            self.pending
+            and self.pending[0]["profile"] == items[0]["profile"]
+            and length + 1 + len(self.pending[0]["message"]) <= PUSHOVER_MESSAGE_LIMIT
+        ):
+            length += 1 + len(self.pending[0]["message"])
+            items.append(self._pop())
+        return items
+
+    def drain(
+        self, pushovers, notification_sender=None, latency=None, budget=OUTBOX_DRAIN_BUDGET
+    ):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """
+        Send due notifications, at most budget (coalesced) requests, pushovers maps profile
+        names to Pushover settings. The sender must return the HTTP status code. Once
+        Pushover accepted a notification, the latency of its records is accounted in
+        latency (LatencyTracker), from flush to delivery as the send stage.
+        Returns the number of notifications delivered.
+        """
+        self._expire()
+        delivered = 0
+        for _ in range(budget):
+            if not self.pending or time.monotonic() < self.next_send:
+                break
+            items = self._coalesce()
+            profile = items[0]["profile"]
+            if profile not in pushovers:
+                print(
+                    f"Outbox: unknown profile {profile}, dropping notification", file=sys.stderr
+                )
+                self._ack(items)
+                continue
+
+            priorities = [item["priority"] for item in items if item["priority"] is not None]
+            status = (notification_sender or send_pushover_notification)(
+                "\n".join(item["message"] for item in items),
+                pushovers[profile],
+                min(priorities) if priorities else None,
+            )
+
+            if status == 200 and latency is not None:
+                now = time.monotonic()
+                for item in items:
+                    if item["id"] in self.timings:
+                        records, flushed = self.timings[item["id"]]
+                        latency.record_batch(records, flushed, now - flushed)
+            if status == 200 or (status is not None and 400 <= status < 500 and status != 429):
+                # Delivered, or rejected for good (e.g. invalid user), retrying will not help
+                self._ack(items)
+                delivered += status == 200
+                self.backoff = 0.0
+                if self.pending and self.pending[0]["id"] <= self.retry_backlog:
+                    self.next_send = time.monotonic() + self.interval
+                continue
+
+            # Server error, rate limit or network failure: keep and retry later, then pace
+            # everything queued until now
+            for item in reversed(items):
+                self.pending.appendleft(item)
+                self.pending_bytes += item["size"]
+            self.retry_backlog = self.pending[-1]["id"]
+            self.backoff = min(max(2 * self.backoff, 5 * self.interval), OUTBOX_MAX_BACKOFF)
+            self.next_send = time.monotonic() + self.backoff
+            break
+        return delivered
+
+
+def catch_up(j, profiles, poll=None):  # pylint: disable=too-many-locals
+    """
+    Consume the journal backlog as fast as possible, without collect-timeout batching.
+    For each profile, matching entries are grouped by unit and message template (numbers
+    stripped, fuzzy duplicates merged). Returns one list of [count, first Record] groups
+    per profile and the last cursor read from each source (None for a single journal).
+    poll is called after each batch, e.g. Controller.poll.
+    """
+    groups = [{} for _ in profiles]
+    digests = [[] for _ in profiles]
+    cursors = {}
+    pending = iter(j)
+    while True:
+        batch = list(islice(pending, BATCH_SIZE))
+        if not batch:
+            break
+        for entry in batch:
+            if "__CURSOR" in entry:
+                cursors[entry.get(SOURCE_FIELD)] = entry["__CURSOR"]
+
+        records = {}  # index -> Record, shared between profiles
+        for profile, profile_groups, digest in zip(profiles, groups, digests):
+            for i, key, stripped, duplicate in find_duplicates(
+                batch,
+                profile.units,
+                profile.fuzzy_threshold,
+                profile.history_buffer,
+                profile.scorer,
+            ):
+                if stripped is None:
+                    stripped = batch[i].get("MESSAGE", "").translate(number_stripper)
+                group = profile_groups.get((key, stripped)) or profile_groups.get((key, duplicate))
+                if group is None:
+                    if i not in records:
+                        records[i] = to_record(batch[i])
+                    group = [0, records[i]]
+                    digest.append(group)
+                group[0] += 1
+                profile_groups[(key, stripped)] = group
+        if poll is not None:
+            poll()
+
+    return digests, cursors
+
+
+def format_digest(digest, top=DIGEST_TOP_MESSAGES, limit=PUSHOVER_MESSAGE_LIMIT):
+    """
+    Summarise catch-up groups: counts per unit, then the most frequent messages.
+    Long lines are cut and units or messages left out to stay within limit characters,
+    the units taking at most half of it.
+    """
+    total = sum(count for count, _ in digest)
+    unit_counts = {}
+    for count, record in digest:
+        unit_counts[record.unit] = unit_counts.get(record.unit, 0) + count
+
+    lines = [f"Catch-up: {total} entries, {len(digest)} distinct messages"]
+
+    def add_lines(section, omitted, budget, more):
+        """Append the section while it fits into budget, then how many were left out."""
+        length = len("\n".join(lines))
+        for i, line in enumerate(section):
+            if len(line) > DIGEST_LINE_LIMIT:
+                line = line[: DIGEST_LINE_LIMIT - 3] + "..."
+            left = len(section) - i - 1 + omitted
+            reserve = len(more.format(left)) + 1 if left else 0
+            if length + 1 + len(line) + reserve > budget:
+                omitted += len(section) - i
+                break
+            lines.append(line)
+            length += 1 + len(line)
+        if omitted:
+            lines.append(more.format(omitted))
+
+    add_lines(
+        [
+            f"{unit}: {count}"
+            for unit, count in sorted(unit_counts.items(), key=lambda item: -item[1])
+        ],
+        0,
+        limit // 2,
+        "... and {} more units",
+    )
+    lines.append("")
+    add_lines(
+        [
+            f"{count}x {format_message(record)}"
+            for count, record in sorted(digest, key=lambda group: -group[0])[:top]
+        ],
+        max(len(digest) - top, 0),
+        limit,
+        "... and {} more",
+    )
+
+    return "\n".join(lines)
+
+
+def send_digest(digest, pushover, notification_sender=None):
+    """Send the catch-up digest as a single notification."""
+    if digest:
+        full_text = format_digest(digest)
+        priority = highest_priority([record for _, record in digest])
+
+        if notification_sender:
+            notification_sender(full_text, pushover, priority)
+        else:
+            send_pushover_notification(full_text, pushover, priority)
+
+
+def cursor_path(cursor_file, source=None):
+    """Cursor file of a configured source, the plain cursor_file for a single journal."""
+    return f"{cursor_file}.{source}" if source else cursor_file
+
+
+def load_cursor(cursor_file):
+    """Return the journal cursor saved in cursor_file, or None."""
+    try:
+        with open(cursor_file, "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def save_cursor(cursor_file, cursor):
+    """Atomically persist the journal cursor to cursor_file."""
+    temp_file = f"{cursor_file}.tmp"
+    try:
+        with open(temp_file, "w", encoding="utf-8") as f:
+            f.write(cursor)
+        os.replace(temp_file, cursor_file)
+    except OSError as e:
+        print(f"Error saving journal cursor: {e}", file=sys.stderr)
+
+
+def open_journal(since=None, cursor=None, directory=None, files=None):
+    """
+    Open the system journal, or the one in directory or files, positioned after cursor,
+    at since (datetime) or, by default, at the tail (of the current boot, for the local
+    system journal).
+    """
+    if directory:
+        j = systemd.journal.Reader(path=directory)
+    elif files:
+        j = systemd.journal.Reader(files=files)
+    else:
+        j = systemd.journal.Reader()
+    j.log_level(systemd.journal.LOG_INFO)
+    if cursor:
+        j.seek_cursor(cursor)
+        # The cursor entry itself was already processed, unless it has been rotated away
+        if j.get_next() and not j.test_cursor(cursor):
+            j.get_previous()
+    elif since:
+        j.seek_realtime(since)
+    else:
+        if not (directory or files):
+            j.this_boot()
+        j.seek_tail()
+        j.get_previous()
+    return j
+
+
+def open_sources(sources, cursors, since=None):
+    """
+    Open the journals of configured sources by name, positioned like open_journal.
+    Sources that cannot be opened, e.g. the directory of a remote host that has not
+    uploaded yet, are logged and left out.
+    """
+    readers = {}
+    for name, source in sources.items():
+        try:
+            readers[name] = open_journal(
+                since, cursors.get(name), source["directory"], source["files"]
+            )
+        except OSError as e:
+            print(f"Cannot open source {name!r}, retrying later: {e}", file=sys.stderr)
+    return readers
+
+
+class MultiReader:
+    """
+    Follows several journals at once, multiplexed with poll(). Offers the wait() and
+    iteration interface of a single systemd.journal.Reader, reading the sources in turn
+    and tagging each entry with its source name (SOURCE_FIELD).
+    """
+
+    def __init__(self, readers):
+        self.readers = readers  # source name -> Reader
+        self.poller = select.poll()
+        for reader in readers.values():
+            self.poller.register(reader.fileno(), reader.get_events())
+        # Sources that may have unread entries, initially all of them
+        self.ready = list(readers)
+
+    def add(self, name, reader):
+        """Follow another source, e.g. one that could not be opened before."""
+        self.readers[name] = reader
+        self.poller.register(reader.fileno(), reader.get_events())
+        self.ready.append(name)
+
+    def wait(self, timeout):
+        """Wait up to timeout seconds for any source to change, like Reader.wait()."""
+        if self.ready:
+            return systemd.journal.APPEND
+        timeout_ms = int(timeout * 1000)
+        for reader in self.readers.values():
+            reader_timeout = reader.get_timeout_ms()
+            if reader_timeout >= 0:
+                timeout_ms = min(timeout_ms, reader_timeout)
+        self.poller.poll(timeout_ms)
+        for name, reader in self.readers.items():
+            if reader.process() != systemd.journal.NOP:
+                self.ready.append(name)
+        return systemd.journal.APPEND if self.ready else systemd.journal.NOP
+
+    def __iter__(self):
+        while self.ready:
+            for name in list(self.ready):
+                reader = self.readers[name]
+                # Interleave sources in chunks, so a busy source cannot starve the others
+                for _ in range(BATCH_SIZE):
+                    entry = reader.get_next()
+                    if not entry:
+                        self.ready.remove(name)
+                        break
+                    entry[SOURCE_FIELD] = name
+                    yield entry
 
 
 def cleanup_history(history_buffer, deduplication_window):
     """Remove old entries from the history buffer."""
-    for message in list(history_buffer):
-        if datetime.now() - history_buffer[message] > timedelta(
-            minutes=deduplication_window
-        ):
-            del history_buffer[message]
+    cutoff = time.monotonic() - deduplication_window * 60
+    for message in [m for m, seen in history_buffer.items() if seen < cutoff]:
+        del history_buffer[message]
 
 
-def run_daemon(
-    config_path, journal_reader=None, notification_sender=None
-):  # pylint: disable=too-many-locals,too-many-branches
-    """Run the main daemon loop."""
-    config_data = load_config(config_path)
-    units = config_data["units"]
-    collect_timeout = config_data["collect_timeout"]
-    deduplication_window = config_data["deduplication_window"]
-    fuzzy_threshold = config_data["fuzzy_threshold"]
-    pushover = config_data["pushover"]
-    title = config_data["title"]
-    priority_map = config_data["priority_map"]
-    cleanup_interval = 60  # [s]
+def cleanup_shards(history_buffer, config_units, deduplication_window):
+    """Clean up each unit's history shard with its own window, dropping empty shards."""
+    for key in list(history_buffer):
+        unit = next((u for u in config_units if u.match.search(shard_unit(key))), None)
+        window = deduplication_window
+        if unit is not None and unit.deduplication_window is not None:
+            window = unit.deduplication_window
+        shard = history_buffer[key]
+        cleanup_history(shard, window)
+        if not shard:
+            del history_buffer[key]
+
+
+class Profile:  # pylint: disable=too-many-instance-attributes
+    """A set of notification rules with its own Pushover settings, buffer and dedup history."""
+
+    def __init__(
+        self,
+        name,
+        units,
+        collect_timeout,
+        deduplication_window,
+        fuzzy_threshold,
+        pushover,
+        scorer=None,
+    ):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self.name = name
+        self.units = units
+        self.collect_timeout = collect_timeout
+        self.deduplication_window = deduplication_window
+        self.fuzzy_threshold = fuzzy_threshold
+        self.pushover = pushover
+        self.scorer = scorer
+        self.entries_buffer = []
+        self.history_buffer = {}
+        self.last_entry_time = time.monotonic()
+        self.collection_triggered = False
+        self.hits = Counter()
+
+    def process_batch(self, entries):
+        """Return this profile's verdicts for a batch of journal entries."""
+        return process_batch(
+            entries, self.units, self.fuzzy_threshold, self.history_buffer, self.scorer, self.hits
+        )
+
+    def add(self, record):
+        """Buffer an accepted record, starting the collection window if needed."""
+        self.entries_buffer.append(record)
+        if not self.collection_triggered:
+            self.last_entry_time = time.monotonic()
+            self.collection_triggered = True
+
+    def flush_due(self):
+        """True if the collection window has passed."""
+        return (
+            self.collection_triggered
+            and time.monotonic() - self.last_entry_time >= self.collect_timeout
+        )
+
+    def flush(self, notification_sender=None, latency=None, outbox=None):
+        """
+        Send all buffered records as one notification. With an outbox, they are queued
+        instead and their latency is recorded once Pushover accepted them (Outbox.drain).
+        """
+        flushed = time.monotonic()
+        records = self.entries_buffer
+        queued = (
+            outbox is not None
+            and bool(records)
+            and outbox.enqueue(
+                self.name,
+                [format_message(record) for record in records],
+                highest_priority(records),
+                records,
+                flushed,
+            )
+        )
+        if not queued:
+            send_collected_messages(records, self.pushover, notification_sender)
+            if latency is not None:
+                latency.record_batch(records, flushed, time.monotonic() - flushed)
+        self.entries_buffer = []
+        self.collection_triggered = False
 
+    def cleanup(self):
+        """Remove expired messages from the deduplication history."""
+        cleanup_shards(self.history_buffer, self.units, self.deduplication_window)
+
+
+def make_profiles(config_data, scorer=None):
+    """
+    Build Profiles from the loaded configuration. Each profile's Pushover settings are
+    layered over the top-level ones, which can be set in the environment.
+    Exits if a profile has no credentials.
+    """
+    base_pushover = dict(config_data["pushover"])
     if "PUSHLOG_PUSHOVER_TOKEN" in os.environ:
-        pushover["token"] = os.environ["PUSHLOG_PUSHOVER_TOKEN"]
+        base_pushover["token"] = os.environ["PUSHLOG_PUSHOVER_TOKEN"]
     if "PUSHLOG_PUSHOVER_USER_KEY" in os.environ:
-        pushover["user"] = os.environ["PUSHLOG_PUSHOVER_USER_KEY"]
-    if title:
-        pushover["title"] = title
-    if priority_map:
-        pushover["priority_map"] = priority_map
-    if not pushover.get("token") or not pushover.get("user"):
-        print("Pushover API credentials missing. Aborting.", file=sys.stderr)
+        base_pushover["user"] = os.environ["PUSHLOG_PUSHOVER_USER_KEY"]
+
+    profiles = []
+    for profile_config in config_data["profiles"]:
+        pushover = dict(base_pushover, **profile_config["pushover"])
+        if profile_config["title"]:
+            pushover["title"] = profile_config["title"]
+        if profile_config["priority_map"]:
+            pushover["priority_map"] = profile_config["priority_map"]
+        if not pushover.get("token") or not pushover.get("user"):
+            print(
+                f"Pushover API credentials missing for profile {profile_config['name']}. Aborting.",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+        profiles.append(
+            Profile(
+                profile_config["name"],
+                profile_config["units"],
+                profile_config["collect_timeout"],
+                profile_config["deduplication_window"],
+                profile_config["fuzzy_threshold"],
+                pushover,
+                scorer,
+            )
+        )
+    return profiles
+
+
+def memory_usage():
+    """Current and peak resident set size of this process in KiB."""
+    usage = {"max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+    try:
+        with open("/proc/self/statm", "r", encoding="utf-8") as statm:
+            usage["rss_kib"] = int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        pass
+    return usage
+
+
+class StackSampler(threading.Thread):
+    """
+    Sampling CPU profiler for the main thread. Writes collapsed stacks
+    (`frame;frame;frame count`, as used by flamegraph tools) to path when done.
+    """
+
+    def __init__(self, seconds, path, interval=PROFILER_INTERVAL):
+        super().__init__(name="pushlog-profiler", daemon=True)
+        self.seconds = seconds
+        self.path = path
+        self.interval = interval
+        self.target_id = threading.main_thread().ident
+
+    def run(self):
+        stacks = Counter()
+        deadline = time.monotonic() + self.seconds
+        while time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.target_id)  # pylint: disable=protected-access
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                location = f"{os.path.basename(code.co_filename)}:{frame.f_lineno}"
+                stack.append(f"{code.co_name} ({location})")
+                frame = frame.f_back
+            stacks[";".join(reversed(stack))] += 1
+            time.sleep(self.interval)
+        with open(self.path, "w", encoding="utf-8") as profile_file:
+            for stack, count in stacks.most_common():
+                profile_file.write(f"{stack} {count}\n")
+
+
+def capture_tracemalloc(seconds, path):
+    """
+    Trace allocations for seconds in the background, then write the top allocation sites.
+    Returns the timer thread, captures must not overlap.
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start(25)
+
+    def finish():
+        snapshot = tracemalloc.take_snapshot()
+        if not was_tracing:
+            tracemalloc.stop()
+        with open(path, "w", encoding="utf-8") as trace_file:
+            for stat in snapshot.statistics("traceback")[:50]:
+                trace_file.write(f"{stat}\n")
+                for line in stat.traceback.format():
+                    trace_file.write(f"{line}\n")
+                trace_file.write("\n")
+
+    timer = threading.Timer(seconds, finish)
+    timer.daemon = True
+    timer.start()
+    return timer
+
+
+class ControlHandler(socketserver.StreamRequestHandler):
+    """Reads one command line, hands it to the daemon loop and writes the JSON reply."""
+
+    def handle(self):
+        command = self.rfile.readline().decode("utf-8", "replace").strip()
+        reply = queue.Queue(maxsize=1)
+        self.server.controller.requests.put((command, reply))
+        try:
+            result = reply.get(timeout=10)
+        except queue.Empty:
+            result = {"error": "daemon busy"}
+        self.wfile.write(json.dumps(result, default=str).encode() + b"\n")
+
+
+class ControlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Local control socket, see Controller."""
+
+    daemon_threads = True
+
+
+class Controller:  # pylint: disable=too-many-instance-attributes
+    """
+    Runtime introspection without restarting the daemon. SIGUSR1 writes a state snapshot
+    to stderr. The optional control socket accepts the commands `status`,
+    `profile <seconds>` (sampling CPU profile) and `tracemalloc <seconds>` (at most
+    CAPTURE_MAX_SECONDS), replying with JSON.
+    Requests are served from the daemon loop (poll), so state is never read mid-update.
+    """
+
+    def __init__(
+        self, profiles, latency, outbox=None, socket_path=None, profile_dir=None
+    ):  # pylint: disable=too-many-arguments
+        self.profiles = profiles
+        self.latency = latency
+        self.outbox = outbox
+        self.profile_dir = profile_dir or tempfile.gettempdir()
+        self.started = time.monotonic()
+        self.requests = queue.Queue()
+        self.dump_requested = False
+        self.captures = {}  # running profiler thread per command
+        self.server = None
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGUSR1, self._request_dump)
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            self.server = ControlServer(socket_path, ControlHandler)
+            self.server.controller = self
+            threading.Thread(
+                target=self.server.serve_forever, name="pushlog-control", daemon=True
+            ).start()
+
+    def _request_dump(self, _signum, _frame):
+        self.dump_requested = True
+
+    def snapshot(self):
+        """Return a JSON-serialisable summary of the live daemon state."""
+        now = time.monotonic()
+        profiles = []
+        for profile in self.profiles:
+            history = [
+                (seen, shard_label(key), message)
+                for key, shard in profile.history_buffer.items()
+                for message, seen in shard.items()
+            ]
+            history.sort(reverse=True)
+            profiles.append(
+                {
+                    "name": profile.name,
+                    "pending_entries": len(profile.entries_buffer),
+                    "history_size": len(history),
+                    "history_units": {
+                        shard_label(key): len(shard)
+                        for key, shard in sorted(
+                            profile.history_buffer.items(), key=lambda item: -len(item[1])
+                        )[:SNAPSHOT_TOP_ENTRIES]
+                    },
+                    "history_latest": [
+                        {"unit": unit_name, "message": message, "age": round(now - seen, 1)}
+                        for seen, unit_name, message in history[:SNAPSHOT_TOP_ENTRIES]
+                    ],
+                    "rule_hits": dict(profile.hits),
+                }
+            )
+        return {
+            "uptime": round(now - self.started, 1),
+            "journal_lag": self.latency.journal_lag if self.latency else None,
+            "memory": memory_usage(),
+            "outbox": (
+                {"pending": len(self.outbox.pending), "bytes": self.outbox.pending_bytes}
+                if self.outbox
+                else None
+            ),
+            "profiles": profiles,
+        }
+
+    def handle(self, command):
+        """Execute one control command and return the reply."""
+        parts = command.split()
+        name = parts[0] if parts else ""
+        if name == "status":
+            return self.snapshot()
+        if name in ("profile", "tracemalloc"):
+            try:
+                seconds = float(parts[1]) if len(parts) > 1 else 10.0
+            except ValueError:
+                seconds = float("nan")
+            # Also rejects inf and nan, which would leave the capture running for good
+            if not 0 < seconds <= CAPTURE_MAX_SECONDS:
+                return {
+                    "error": f"invalid duration: {parts[1]}, "
+                    f"must be within (0, {CAPTURE_MAX_SECONDS}] seconds"
+                }
+            if name in self.captures and self.captures[name].is_alive():
+                return {"error": f"{name} already running"}
+            # A unique file, even for several requests within the same second
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            kind = "cpu" if name == "profile" else "tracemalloc"
+            try:
+                fd, path = tempfile.mkstemp(
+                    ".txt", f"pushlog-{kind}-{stamp}-", self.profile_dir, text=True
+                )
+            except OSError as e:
+                return {"error": f"cannot create profile: {e}"}
+            os.close(fd)
+            if name == "profile":
+                self.captures[name] = StackSampler(seconds, path)
+                self.captures[name].start()
+            else:
+                self.captures[name] = capture_tracemalloc(seconds, path)
+            return {"started": name, "seconds": seconds, "path": path}
+        return {"error": f"unknown command: {command}"}
+
+    def poll(self):
+        """Serve pending requests, call regularly from the daemon loop."""
+        if self.dump_requested:
+            self.dump_requested = False
+            print(json.dumps(self.snapshot(), default=str), file=sys.stderr)
+        while True:
+            try:
+                command, reply = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            reply.put(self.handle(command))
+
+    def close(self):
+        """Stop the control socket."""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            os.unlink(self.server.server_address)
+
+
+def run_daemon(
+    config_path, journal_reader=None, notification_sender=None, since=None, cursor_file=None
+):  # pylint: disable=too-many-locals,too-many-branches,too-many-statements,too-many-arguments
+    """
+    Run the main daemon loop. Every journal entry is read once and evaluated against
+    all profiles. With a saved cursor or since, the backlog is first summarised in a
+    digest notification per profile.
+    """
+    # pylint: disable=too-many-nested-blocks
+    config_data = load_config(config_path)
+    metrics_file = config_data["metrics_file"]
+    try:
+        scorer = SCORERS[config_data["fuzzy_backend"]]()
+    except (KeyError, ImportError) as e:
+        print(f"Unsupported fuzzy-backend {e}. Aborting.", file=sys.stderr)
         sys.exit(1)
+    profiles = make_profiles(config_data, scorer)
+    senders = {profile.name: notification_sender for profile in profiles}
+    outbox = None
+    pushovers = {}
+    if config_data["outbox"]:
+        outbox = Outbox(
+            config_data["outbox"],
+            config_data["outbox_max_size"],
+            config_data["outbox_retention"],
+            config_data["outbox_interval"],
+        )
+        senders = {
+            profile.name: outbox.sender(profile.name, notification_sender) for profile in profiles
+        }
+        pushovers = {profile.name: profile.pushover for profile in profiles}
+    cleanup_interval = 60  # [s]
+    metrics_interval = 10  # [s]
+    source_retry_interval = 60  # [s]
 
-    if journal_reader is None:
-        j = systemd.journal.Reader()
-        j.log_level(systemd.journal.LOG_INFO)
-        j.this_boot()
-        j.seek_tail()
-        j.get_previous()
-    else:
+    # One cursor per source, keyed None for the local system journal
+    sources = {source["name"]: source for source in config_data["sources"]} or {None: {}}
+    cursors = {
+        name: load_cursor(cursor_path(cursor_file, name)) if cursor_file else None
+        for name in sources
+    }
+    # Sources opened later are read from the start time on, the others from their tail
+    started = datetime.now()
+    unopened = {}
+    if journal_reader is not None:
         j = journal_reader
+    elif config_data["sources"]:
+        j = MultiReader(open_sources(sources, cursors, since))
+        unopened = {name: source for name, source in sources.items() if name not in j.readers}
+    else:
+        j = open_journal(since, cursors[None])
 
-    entries_buffer = []
-    history_buffer = {}
-    last_entry_time = datetime.now()
-    last_cleanup_time = datetime.now()
-    collection_triggered = False
-    while True:
-        if j.wait(1) == systemd.journal.APPEND:
-            for entry in j:
-                if should_process_entry(entry, units, fuzzy_threshold, history_buffer):
-                    entries_buffer.append(entry)
-                    if not collection_triggered:
-                        last_entry_time = datetime.now()
-                        collection_triggered = True
-
-        if (
-            collection_triggered
-            and (datetime.now() - last_entry_time).total_seconds() >= collect_timeout
-        ):
-            send_collected_messages(entries_buffer, pushover, notification_sender)
-            entries_buffer = []
-            collection_triggered = False
+    latency = LatencyTracker(config_data["slow_threshold"], config_data["slow_log"])
+    # Before catching up, SIGUSR1 would terminate the daemon otherwise
+    controller = Controller(
+        profiles,
+        latency,
+        outbox,
+        config_data["control_socket"],
+        config_data["profile_dir"],
+    )
+    try:
+        if since or any(cursors.values()):
+            digests, caught_up = catch_up(j, profiles, controller.poll)
+            for profile, digest in zip(profiles, digests):
+                send_digest(digest, profile.pushover, senders[profile.name])
+            if cursor_file:
+                for name, cursor in caught_up.items():
+                    save_cursor(cursor_path(cursor_file, name), cursor)
+            cursors.update(caught_up)
+        last_cursors = dict(cursors)
+        last_cleanup_time = time.monotonic()
+        last_metrics_time = time.monotonic()
+        last_retry_time = time.monotonic()
+        while True:
+            if j.wait(1) == systemd.journal.APPEND:
+                pending = iter(j)
+                while True:
+                    batch = list(islice(pending, BATCH_SIZE))
+                    if not batch:
+                        break
+                    lags = [journal_lag(entry) for entry in batch]
+                    started = time.perf_counter()
+                    verdicts = [profile.process_batch(batch) for profile in profiles]
+                    filter_time = (time.perf_counter() - started) / len(batch)  # amortised
+                    for entry in batch:
+                        if "__CURSOR" in entry:
+                            last_cursors[entry.get(SOURCE_FIELD)] = entry["__CURSOR"]
+                    latency.journal_lag = lags[-1]
+                    for i, entry in enumerate(batch):
+                        # Accepted entries share one record between all profiles
+                        record = None
+                        for profile, profile_verdicts in zip(profiles, verdicts):
+                            if profile_verdicts[i]:
+                                if record is None:
+                                    record = to_record(entry, lags[i], filter_time)
+                                profile.add(record)
+            else:
+                # Nothing new within the wait timeout, so the reader is at the tail
+                latency.journal_lag = 0.0
+
+            checkpoint = False
+            for profile in profiles:
+                if profile.flush_due():
+                    profile.flush(notification_sender, latency, outbox)
+                    checkpoint = True
+
+            if outbox is not None:
+                outbox.drain(pushovers, notification_sender, latency)
+
+            controller.poll()
 
-        if (datetime.now() - last_cleanup_time).total_seconds() >= cleanup_interval:
-            cleanup_history(history_buffer, deduplication_window)
-            last_cleanup_time = datetime.now()
+            if unopened and time.monotonic() - last_retry_time >= source_retry_interval:
+                for name, reader in open_sources(unopened, cursors, since or started).items():
+                    j.add(name, reader)
+                    del unopened[name]
+                last_retry_time = time.monotonic()
+
+            if metrics_file and time.monotonic() - last_metrics_time >= metrics_interval:
+                latency.write_metrics(metrics_file)
+                last_metrics_time = time.monotonic()
+
+            if time.monotonic() - last_cleanup_time >= cleanup_interval:
+                for profile in profiles:
+                    profile.cleanup()
+                last_cleanup_time = time.monotonic()
+                checkpoint = True
+
+            # Only advance past entries that are not waiting in any buffer
+            if (
+                cursor_file
+                and checkpoint
+                and not any(profile.collection_triggered for profile in profiles)
+            ):
+                for name, cursor in last_cursors.items():
+                    if cursor and cursor != cursors.get(name):
+                        save_cursor(cursor_path(cursor_file, name), cursor)
+                        cursors[name] = cursor
+    finally:
+        controller.close()
 
 
 @click.command()
@@ -238,10 +1658,27 @@ def run_daemon(
     prompt="Path to configuration file",
     help="The YAML configuration file to apply.",
 )
-def main(config):
+@click.option(
+    "--since",
+    type=click.DateTime(),
+    help="Catch up on journal entries since this time, send a digest, then follow live.",
+)
+@click.option(
+    "--catch-up",
+    "catch_up_minutes",
+    type=int,
+    help="Catch up on the last N minutes of the journal (like --since).",
+)
+@click.option(
+    "--cursor-file",
+    help="File to persist the journal position in. If it exists, catch up from there.",
+)
+def main(config, since, catch_up_minutes, cursor_file):
     """CLI entry point that runs the daemon with the specified config file."""
-    run_daemon(config)
+    if since is None and catch_up_minutes is not None:
+        since = datetime.now() - timedelta(minutes=catch_up_minutes)
+    run_daemon(config, since=since, cursor_file=cursor_file)
 
 
 if __name__ == "__main__":
-    main(sys.argv[1:])
+    main(sys.argv[1:])  # pylint: disable=no-value-for-parameter
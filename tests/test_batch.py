@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Tests for batched deduplication and the fuzzy scorer backends."""
+
+import re
+import unittest
+from unittest.mock import patch
+
+import pushlog_lib
+from pushlog_lib import (FuzzywuzzyScorer, RapidfuzzScorer, Unit,
+                         find_duplicates, process_batch, rapidfuzz_process,
+                         should_process_entry)
+
+
+class BatchTests(unittest.TestCase):
+    """Test cases shared by all scorer backends, run by the subclasses."""
+    scorer_class = None
+
+    def setUp(self):
+        if self.scorer_class is None:
+            self.skipTest("shared test cases without a backend")
+        self.scorer = self.scorer_class()  # pylint: disable=not-callable
+        self.units = [
+            Unit(
+                match=re.compile("test-unit"),
+                priorities=[0, 1, 2, 3, 4, 5, 6],
+                include_regexs=[],
+                exclude_regexs=[re.compile("exclude_me")],
+            ),
+            Unit(
+                match=re.compile("strict-unit"),
+                priorities=[0, 1, 2, 3],
+                include_regexs=[],
+                exclude_regexs=[],
+                fuzzy_threshold=99,
+            ),
+            Unit(
+                match=re.compile("critical-unit"),
+                priorities=[0, 1, 2, 3],
+                include_regexs=[],
+                exclude_regexs=[],
+                deduplication_window=0,
+            ),
+        ]
+        self.fuzzy_threshold = 95
+
+        messages = [
+            "Error A12: Connection failed",
+            "Error B12: Connection failed",
+            "Warning: Disk space low",
+            "2025/04/27 01:53:26 - Error A12: Connection failed",
+            "Please exclude_me",
+            "",
+            "12345",
+            "Warning: Disk space low",
+            "Connection failed: Error A12",
+        ]
+        self.entries = [
+            {"_SYSTEMD_UNIT": unit, "PRIORITY": priority, "MESSAGE": message}
+            for unit in ("test-unit.service", "strict-unit.service", "critical-unit.service")
+            for priority in (3, 5)
+            for message in messages
+        ]
+        # Interleave units like a real journal
+        self.entries.sort(key=lambda entry: entry["MESSAGE"])
+
+    def test_matches_per_entry_path(self):
+        """Test that batched verdicts and history equal the per-entry path."""
+        sequential_history = {}
+        sequential = [
+            should_process_entry(
+                entry, self.units, self.fuzzy_threshold, sequential_history, self.scorer
+            )
+            for entry in self.entries
+        ]
+
+        batched_history = {}
+        batched = process_batch(
+            self.entries[:10], self.units, self.fuzzy_threshold, batched_history, self.scorer
+        ) + process_batch(
+            self.entries[10:], self.units, self.fuzzy_threshold, batched_history, self.scorer
+        )
+
+        self.assertEqual(batched, sequential)
+        self.assertEqual(
+            {unit: list(shard) for unit, shard in batched_history.items()},
+            {unit: list(shard) for unit, shard in sequential_history.items()},
+        )
+
+    def test_chunked_scoring(self):
+        """Test that scoring in chunks gives the same verdicts as one step."""
+        whole = process_batch(self.entries, self.units, self.fuzzy_threshold, {}, self.scorer)
+        with patch.object(pushlog_lib, "SCORE_CHUNK_SIZE", 4):
+            chunked = process_batch(
+                self.entries, self.units, self.fuzzy_threshold, {}, self.scorer
+            )
+        self.assertEqual(chunked, whole)
+
+    def test_find_duplicates(self):
+        """Test that duplicates name the similar message they repeat."""
+        messages = ("Error A: Connection failed", "Disk space low", "Error B: Connection failed")
+        entries = [
+            {"_SYSTEMD_UNIT": "test-unit.service", "PRIORITY": 3, "MESSAGE": message}
+            for message in messages
+        ]
+        entries.append({"_SYSTEMD_UNIT": "critical-unit.service", "PRIORITY": 3, "MESSAGE": "x"})
+        matches = find_duplicates(entries, self.units, self.fuzzy_threshold, {}, self.scorer)
+
+        self.assertEqual(
+            matches,
+            [
+                (0, "test-unit.service", messages[0], None),
+                (1, "test-unit.service", messages[1], None),
+                (2, "test-unit.service", messages[2], messages[0]),
+                (3, "critical-unit.service", None, None),
+            ],
+        )
+
+    def test_duplicates_within_batch(self):
+        """Test that repeats inside one batch are suppressed."""
+        entries = [
+            {"_SYSTEMD_UNIT": "test-unit.service", "PRIORITY": 3, "MESSAGE": f"Error {i}: failed"}
+            for i in range(5)
+        ]
+        verdicts = process_batch(entries, self.units, self.fuzzy_threshold, {}, self.scorer)
+        self.assertEqual(verdicts, [True, False, False, False, False])
+
+    def test_best_match(self):
+        """Test looking up the most similar choice."""
+        self.assertIsNone(self.scorer.best_match("Error", []))
+        choice, score = self.scorer.best_match(
+            "Error A: Connection failed", ["Disk space low", "Error B: Connection failed"]
+        )
+        self.assertEqual(choice, "Error B: Connection failed")
+        self.assertGreaterEqual(score, 90)
+
+
+class TestFuzzywuzzyBatch(BatchTests, unittest.TestCase):
+    """Batched deduplication with the default fuzzywuzzy backend."""
+    scorer_class = FuzzywuzzyScorer
+
+
+@unittest.skipIf(rapidfuzz_process is None, "rapidfuzz not installed")
+class TestRapidfuzzBatch(BatchTests, unittest.TestCase):
+    """Batched deduplication with the rapidfuzz backend."""
+    scorer_class = RapidfuzzScorer
+
+
+if __name__ == "__main__":
+    unittest.main()
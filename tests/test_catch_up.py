@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Tests for the catch-up mode and digest notifications."""
+
+import os
+import re
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from pushlog_lib import (DIGEST_LINE_LIMIT, PUSHOVER_MESSAGE_LIMIT, Profile,
+                         Unit, catch_up, format_digest,
+                         load_cursor, save_cursor, send_digest)
+
+
+class TestCatchUp(unittest.TestCase):
+    """Test cases for consuming a journal backlog into a digest."""
+    def setUp(self):
+        self.units = [
+            Unit(
+                match=re.compile("test-unit"),
+                priorities=[0, 1, 2, 3, 4, 5, 6],
+                include_regexs=[],
+                exclude_regexs=[re.compile("exclude_me")],
+            ),
+            Unit(
+                match=re.compile("another-unit"),
+                priorities=[0, 1, 2, 3],
+                include_regexs=[],
+                exclude_regexs=[],
+            ),
+        ]
+        self.profile = Profile("default", self.units, 5, 30, 95, {})
+
+        # A backlog as returned by iterating over a journal reader
+        self.backlog = [
+            self.entry(1, "test-unit.service", 3, "Error A12: Connection failed"),
+            self.entry(2, "test-unit.service", 3, "Error B12: Connection failed"),
+            self.entry(3, "test-unit.service", 3, "Error A13: Connection failed"),
+            self.entry(4, "test-unit.service", 3, "Please exclude_me"),
+            self.entry(5, "unknown-unit.service", 0, "Not monitored"),
+            self.entry(6, "another-unit.service", 2, "Disk space low"),
+            self.entry(7, "test-unit.service", 3, "Error A14: Connection failed"),
+        ]
+
+    @staticmethod
+    def entry(i, unit, priority, message):
+        """Build a journal entry with a cursor."""
+        return {
+            "__CURSOR": f"cursor-{i}",
+            "_SYSTEMD_UNIT": unit,
+            "SYSLOG_IDENTIFIER": "test-process",
+            "__REALTIME_TIMESTAMP": f"ts-{i}",
+            "PRIORITY": priority,
+            "MESSAGE": message,
+        }
+
+    def test_catch_up(self):
+        """Test grouping of the backlog by unit and template."""
+        (digest,), cursors = catch_up(iter(self.backlog), [self.profile])
+
+        # The last entry read is the resume position, even if it was filtered out
+        self.assertEqual(cursors, {None: "cursor-7"})
+
+        # Fuzzy duplicates are merged into the group of the first occurrence
+        self.assertEqual(len(digest), 2)
+        self.assertEqual(digest[0][0], 4)
+        self.assertEqual(digest[0][1].message, "Error A12: Connection failed")
+        self.assertEqual(digest[1][0], 1)
+        self.assertEqual(digest[1][1].unit, "another-unit.service")
+
+        # Deduplication history carries over to live tailing
+        self.assertIn(
+            "Error A: Connection failed", self.profile.history_buffer["test-unit.service"]
+        )
+
+    def test_catch_up_fuzzy_disabled(self):
+        """Test that only identical templates are grouped without fuzzy matching."""
+        self.profile.fuzzy_threshold = 100
+        (digest,), _ = catch_up(iter(self.backlog), [self.profile])
+
+        self.assertEqual([count for count, _ in digest], [3, 1, 1])
+        self.assertEqual(len(self.profile.history_buffer), 0)
+
+    def test_catch_up_profiles(self):
+        """Test that each profile gets its own digest from a single pass."""
+        other = Profile("other", self.units[1:], 5, 30, 95, {})
+        (digest, other_digest), _ = catch_up(iter(self.backlog), [self.profile, other])
+
+        self.assertEqual(len(digest), 2)
+        self.assertEqual(len(other_digest), 1)
+        self.assertEqual(other_digest[0][1].unit, "another-unit.service")
+
+        # Profiles share the record of an entry both accepted
+        self.assertIs(other_digest[0][1], digest[1][1])
+
+    def test_format_digest(self):
+        """Test the digest text."""
+        (digest,), _ = catch_up(iter(self.backlog), [self.profile])
+        text = format_digest(digest, top=1)
+
+        lines = text.split("\n")
+        self.assertEqual(lines[0], "Catch-up: 5 entries, 2 distinct messages")
+        self.assertEqual(lines[1], "test-unit.service: 4")
+        self.assertEqual(lines[2], "another-unit.service: 1")
+        self.assertIn("4x ts-1 test-unit.service[test-process]: Error A12", text)
+        self.assertNotIn("Disk space low", text)
+        self.assertEqual(lines[-1], "... and 1 more")
+
+    def test_format_digest_limit(self):
+        """Test a large backlog still gives a digest within the Pushover message limit."""
+        backlog = [
+            self.entry(i, f"test-unit-{i % 40}.service", 3, f"Message {i} " + "word " * 11 * i)
+            for i in range(200)
+        ]
+        self.profile.fuzzy_threshold = 100
+        (digest,), _ = catch_up(iter(backlog), [self.profile])
+        text = format_digest(digest)
+
+        self.assertLessEqual(len(text), PUSHOVER_MESSAGE_LIMIT)
+        lines = text.split("\n")
+        self.assertEqual(lines[0], "Catch-up: 200 entries, 200 distinct messages")
+        self.assertRegex(text, r"\n\.\.\. and \d+ more units\n")
+        self.assertRegex(lines[-1], r"^\.\.\. and \d+ more$")
+        self.assertTrue(all(len(line) <= DIGEST_LINE_LIMIT for line in lines))
+
+    def test_send_digest(self):
+        """Test sending the digest with the highest priority."""
+        (digest,), _ = catch_up(iter(self.backlog), [self.profile])
+        mock_sender = MagicMock()
+        pushover = {"token": "test_token", "user": "test_user"}
+
+        send_digest(digest, pushover, mock_sender)
+
+        mock_sender.assert_called_once()
+        args, _ = mock_sender.call_args
+        self.assertIn("Catch-up: 5 entries", args[0])
+        self.assertEqual(args[1], pushover)
+        self.assertEqual(args[2], 2)
+
+    def test_send_digest_empty(self):
+        """Test that an empty backlog sends nothing."""
+        mock_sender = MagicMock()
+        send_digest([], {}, mock_sender)
+        mock_sender.assert_not_called()
+
+    def test_cursor_file(self):
+        """Test persisting and loading the journal cursor."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cursor_file = os.path.join(temp_dir, "cursor")
+            self.assertIsNone(load_cursor(cursor_file))
+
+            save_cursor(cursor_file, "s=abc;i=1")
+            self.assertEqual(load_cursor(cursor_file), "s=abc;i=1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,12 +2,13 @@
 """Tests for the configuration loading functionality."""
 
 import os
+import tempfile
 import unittest
 from unittest.mock import patch
 
 import yaml
 
-from pushlog_lib import load_config
+from pushlog_lib import load_config, make_profiles
 
 
 class TestConfig(unittest.TestCase):
@@ -45,18 +46,95 @@ class TestConfig(unittest.TestCase):
         self.assertEqual(unit.priorities, [0, 1, 2, 3, 4, 5, 6])
         self.assertEqual(len(unit.include_regexs), 0)
         self.assertEqual(len(unit.exclude_regexs), 1)
+        self.assertIsNone(unit.deduplication_window)
+        self.assertIsNone(unit.fuzzy_threshold)
 
         # Check second unit
         unit = config["units"][1]
         self.assertEqual(unit.priorities, [0, 1, 2, 3])
         self.assertEqual(len(unit.include_regexs), 2)
         self.assertEqual(len(unit.exclude_regexs), 1)
+        self.assertEqual(unit.deduplication_window, 120)
+        self.assertEqual(unit.fuzzy_threshold, 80)
 
         # Check third unit with regex pattern
         unit = config["units"][2]
         self.assertEqual(len(unit.include_regexs), 1)
         self.assertEqual(len(unit.exclude_regexs), 0)
 
+    def test_load_config_default_profile(self):
+        """Test that a config without profiles has a single default profile."""
+        config = load_config(self.config_path)
+
+        self.assertEqual(len(config["profiles"]), 1)
+        profile = config["profiles"][0]
+        self.assertEqual(profile["name"], "default")
+        self.assertEqual(len(profile["units"]), 3)
+        self.assertEqual(profile["title"], "Test Logs")
+
+    @patch.dict("os.environ", {"PUSHLOG_PUSHOVER_TOKEN": "env_token"})
+    def test_load_config_profiles(self):
+        """Test profiles inheriting and overriding top-level settings."""
+        config = load_config(
+            os.path.join(os.path.dirname(__file__), "fixtures", "test_profiles.yaml")
+        )
+        profiles = make_profiles(config)
+
+        self.assertEqual([p.name for p in profiles], ["ops", "db-team"])
+
+        # The first profile inherits everything
+        self.assertEqual(len(profiles[0].units), 1)
+        self.assertEqual(profiles[0].units[0].match.pattern, "test-unit")
+        self.assertEqual(profiles[0].collect_timeout, 5)
+        self.assertEqual(
+            profiles[0].pushover, {"token": "env_token", "user": "test_user", "title": "Test Logs"}
+        )
+
+        # The second profile overrides rules and Pushover settings
+        self.assertEqual(profiles[1].units[0].match.pattern, "postgresql")
+        self.assertEqual(profiles[1].collect_timeout, 10)
+        self.assertEqual(profiles[1].fuzzy_threshold, 100)
+        self.assertEqual(profiles[1].deduplication_window, 30)
+        self.assertEqual(
+            profiles[1].pushover, {"token": "env_token", "user": "db_user", "title": "Database"}
+        )
+
+        # Profiles have separate state
+        self.assertIsNot(profiles[0].history_buffer, profiles[1].history_buffer)
+
+    def test_make_profiles_missing_credentials(self):
+        """Test that a profile without credentials aborts."""
+        config = load_config(self.config_path)
+        config["pushover"] = {}
+
+        with patch.dict("os.environ", {}, clear=True), patch("sys.stderr"):
+            with self.assertRaises(SystemExit):
+                make_profiles(config)
+
+    def test_load_config_duplicate_profiles(self):
+        """Test that profiles with the same name abort, their notifications would mix."""
+        with open(self.config_path, "r", encoding="utf-8") as config_file:
+            config = yaml.safe_load(config_file)
+        config["profiles"] = [
+            {"name": "team", "pushover": {"user": "alice"}},
+            {"name": "team", "pushover": {"user": "bob"}},
+        ]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = os.path.join(temp_dir, "config.yaml")
+            with open(config_path, "w", encoding="utf-8") as config_file:
+                yaml.safe_dump(config, config_file)
+            with self.assertRaises(SystemExit), patch("sys.stderr"):
+                load_config(config_path)
+
+            # Default names count as well
+            config["profiles"][1] = {"pushover": {"user": "bob"}}
+            config["profiles"][0]["name"] = "profile-1"
+            with open(config_path, "w", encoding="utf-8") as config_file:
+                yaml.safe_dump(config, config_file)
+            with self.assertRaises(SystemExit), patch("sys.stderr"):
+                load_config(config_path)
+
     @patch("builtins.open")
     def test_load_config_file_not_found(self, mock_open):
         """Test behavior when the config file is not found."""
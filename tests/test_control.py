@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Tests for runtime introspection and on-demand profiling."""
+
+import json
+import os
+import re
+import signal
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from pushlog_lib import Controller, LatencyTracker, Profile, Unit, to_record
+
+
+class TestControl(unittest.TestCase):
+    """Test cases for state snapshots and the control socket."""
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        units = [Unit(re.compile("test-unit"), [3], [], [])]
+        self.profile = Profile("ops", units, 5, 30, 95, {})
+        self.profile.process_batch(
+            [
+                {"_SYSTEMD_UNIT": "test-unit.service", "PRIORITY": 3, "MESSAGE": "First 1"},
+                {"_SYSTEMD_UNIT": "test-unit.service", "PRIORITY": 3, "MESSAGE": "Second 2"},
+                {"_SYSTEMD_UNIT": "other-unit.service", "PRIORITY": 3, "MESSAGE": "Other"},
+            ]
+        )
+        self.profile.add(
+            to_record({"_SYSTEMD_UNIT": "test-unit.service", "PRIORITY": 3, "MESSAGE": "First 1"})
+        )
+        with patch("signal.signal"):
+            self.controller = Controller(
+                [self.profile], LatencyTracker(), profile_dir=self.temp_dir.name
+            )
+
+    def tearDown(self):
+        self.controller.close()
+        self.temp_dir.cleanup()
+
+    def test_snapshot(self):
+        """Test the live state summary."""
+        snapshot = self.controller.snapshot()
+
+        self.assertEqual(len(snapshot["profiles"]), 1)
+        profile = snapshot["profiles"][0]
+        self.assertEqual(profile["name"], "ops")
+        self.assertEqual(profile["pending_entries"], 1)
+        self.assertEqual(profile["history_size"], 2)
+        self.assertEqual(profile["history_units"], {"test-unit.service": 2})
+        self.assertEqual(profile["history_latest"][0]["unit"], "test-unit.service")
+        self.assertEqual(profile["rule_hits"], {"test-unit": 2})
+        self.assertIsNone(snapshot["outbox"])
+        self.assertIn("max_rss_kib", snapshot["memory"])
+        json.dumps(snapshot)
+
+    def test_handle(self):
+        """Test command parsing."""
+        self.assertIn("profiles", self.controller.handle("status"))
+        self.assertIn("error", self.controller.handle("bogus"))
+        self.assertIn("error", self.controller.handle("profile soon"))
+        for duration in ("inf", "nan", "-1", "0", "3601"):
+            self.assertIn("error", self.controller.handle(f"tracemalloc {duration}"))
+            self.assertIn("error", self.controller.handle(f"profile {duration}"))
+        self.assertEqual(self.controller.captures, {})
+
+    def test_signal_dump(self):
+        """Test that SIGUSR1 requests a snapshot on stderr."""
+        with patch("signal.signal") as mock_signal:
+            controller = Controller([self.profile], LatencyTracker())
+        self.assertEqual(mock_signal.call_args[0][0], signal.SIGUSR1)
+
+        mock_signal.call_args[0][1](signal.SIGUSR1, None)
+        with patch("sys.stderr") as mock_stderr:
+            controller.poll()
+        written = "".join(args[0] for args, _ in mock_stderr.write.call_args_list)
+        self.assertEqual(json.loads(written)["profiles"][0]["history_size"], 2)
+
+    def test_profilers(self):
+        """Test that CPU and allocation profiles are written after their duration."""
+        cpu = self.controller.handle("profile 0.05")
+        memory = self.controller.handle("tracemalloc 0.05")
+
+        # Overlapping captures are refused
+        self.assertIn("error", self.controller.handle("tracemalloc 0.05"))
+
+        for capture in self.controller.captures.values():
+            capture.join(5)
+
+        with open(cpu["path"], "r", encoding="utf-8") as cpu_file:
+            self.assertRegex(cpu_file.read(), r"test_profilers \(test_control.py:\d+\).* \d+")
+        with open(memory["path"], "r", encoding="utf-8") as memory_file:
+            self.assertTrue(memory_file.read())
+
+    def test_profile_paths(self):
+        """Test that captures started within the same second get their own files."""
+        first = self.controller.handle("profile 0.01")
+        self.controller.captures["profile"].join(5)
+        second = self.controller.handle("profile 0.01")
+        self.controller.captures["profile"].join(5)
+
+        self.assertNotEqual(first["path"], second["path"])
+        self.assertTrue(os.path.basename(first["path"]).startswith("pushlog-cpu-"))
+
+    def test_socket(self):
+        """Test serving a command over the control socket from the daemon loop."""
+        socket_path = os.path.join(self.temp_dir.name, "control.sock")
+        with patch("signal.signal"):
+            controller = Controller([self.profile], LatencyTracker(), socket_path=socket_path)
+
+        stop = threading.Event()
+
+        def daemon_loop():
+            while not stop.is_set():
+                controller.poll()
+                time.sleep(0.01)
+
+        loop = threading.Thread(target=daemon_loop)
+        loop.start()
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.connect(socket_path)
+                client.sendall(b"status\n")
+                reply = client.makefile().readline()
+        finally:
+            stop.set()
+            loop.join()
+            controller.close()
+
+        self.assertEqual(json.loads(reply)["profiles"][0]["name"], "ops")
+        self.assertFalse(os.path.exists(socket_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
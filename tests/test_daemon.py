@@ -1,11 +1,58 @@
 #!/usr/bin/env python3
 """Tests for the daemon functionality."""
 
+import json
 import os
+import signal
+import tempfile
 import unittest
 from datetime import datetime
+from unittest.mock import MagicMock, patch
 
-from pushlog_lib import load_config, should_process_entry
+import systemd.journal
+import yaml
+
+from pushlog_lib import (load_config, load_cursor, make_profiles, run_daemon,
+                         save_cursor, should_process_entry, to_record)
+
+
+class StopDaemon(Exception):
+    """Raised by FakeJournal to end run_daemon."""
+
+
+class FakeJournal:
+    """
+    Scripted stand-in for systemd.journal.Reader. Each step is a list of entries
+    returned by one wait() and iteration, an empty step is a quiet wait() timeout.
+    Raises StopDaemon once all steps are consumed.
+    """
+
+    def __init__(self, steps):
+        self.steps = list(steps)
+
+    def wait(self, timeout):  # pylint: disable=unused-argument
+        """Like Reader.wait(), returns APPEND when the next step has entries."""
+        if not self.steps:
+            raise StopDaemon()
+        if not self.steps[0]:
+            self.steps.pop(0)
+            return systemd.journal.NOP
+        return systemd.journal.APPEND
+
+    def __iter__(self):
+        yield from self.steps.pop(0) if self.steps else []
+
+
+def make_entry(i, message, unit="test-unit.service"):
+    """Build a journal entry with a cursor."""
+    return {
+        "__CURSOR": f"cursor-{i}",
+        "__REALTIME_TIMESTAMP": datetime.now(),
+        "_SYSTEMD_UNIT": unit,
+        "SYSLOG_IDENTIFIER": "test-process",
+        "PRIORITY": 3,
+        "MESSAGE": message,
+    }
 
 
 class TestDaemon(unittest.TestCase):
@@ -44,9 +91,134 @@ class TestDaemon(unittest.TestCase):
         )
         self.assertTrue(result)
 
-        # Test that the message was added to history
+        # Test that the message was added to the unit's history shard
         self.assertEqual(len(history_buffer), 1)
-        self.assertTrue(self.journal_entry["MESSAGE"] in history_buffer)
+        self.assertTrue(self.journal_entry["MESSAGE"] in history_buffer["test-unit.service"])
+
+    def test_profiles(self):
+        """Test evaluating a batch against a profile and flushing its buffer."""
+        profiles = make_profiles(load_config(self.config_path))
+        self.assertEqual(len(profiles), 1)
+        profile = profiles[0]
+        other_entry = dict(self.journal_entry, _SYSTEMD_UNIT="unknown-unit.service")
+
+        verdicts = profile.process_batch([self.journal_entry, other_entry, self.journal_entry])
+        self.assertEqual(verdicts, [True, False, False])
+
+        record = to_record(self.journal_entry)
+        profile.add(record)
+        self.assertTrue(profile.collection_triggered)
+        self.assertFalse(profile.flush_due())
+
+        mock_sender = MagicMock()
+        profile.last_entry_time -= profile.collect_timeout
+        self.assertTrue(profile.flush_due())
+        with patch("pushlog_lib.send_collected_messages") as mock_send:
+            profile.flush(mock_sender)
+        mock_send.assert_called_once_with([record], profile.pushover, mock_sender)
+        self.assertEqual(profile.entries_buffer, [])
+        self.assertFalse(profile.collection_triggered)
+
+
+class TestRunDaemon(unittest.TestCase):
+    """Test cases driving the main loop with a scripted journal."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.cursor_file = os.path.join(self.temp_dir.name, "cursor")
+        self.config = {
+            "collect-timeout": 0,
+            "pushover": {"token": "test_token", "user": "test_user"},
+            "units": [
+                {"match": "test-unit", "priorities": [3], "include": [], "exclude": []},
+            ],
+        }
+        self.sent = []
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def sender(self, message, pushover, priority):
+        """Notification sender recording what would be sent."""
+        self.sent.append((message, pushover["user"], priority))
+
+    def run_daemon(self, steps):
+        """Run the daemon until the scripted journal is consumed."""
+        config_path = os.path.join(self.temp_dir.name, "config.yaml")
+        with open(config_path, "w", encoding="utf-8") as config_file:
+            yaml.safe_dump(self.config, config_file)
+        with self.assertRaises(StopDaemon):
+            run_daemon(
+                config_path,
+                journal_reader=FakeJournal(steps),
+                notification_sender=self.sender,
+                cursor_file=self.cursor_file,
+            )
+
+    def test_run_daemon(self):
+        """Test entries are filtered, deduplicated, sent and checkpointed."""
+        self.run_daemon(
+            [
+                [
+                    make_entry(0, "Disk failure"),
+                    make_entry(1, "Disk failure"),
+                    make_entry(2, "Disk failure", unit="unknown-unit.service"),
+                ],
+                [],
+                [make_entry(3, "Connection lost")],
+            ]
+        )
+
+        self.assertEqual(len(self.sent), 2)
+        self.assertTrue(self.sent[0][0].endswith("test-unit.service[test-process]: Disk failure"))
+        self.assertNotIn("\n", self.sent[0][0])
+        self.assertTrue(self.sent[1][0].endswith("Connection lost"))
+        self.assertEqual(self.sent[0][1:], ("test_user", 3))
+        self.assertEqual(load_cursor(self.cursor_file), "cursor-3")
+
+    def test_run_daemon_checkpoint(self):
+        """Test the cursor is not advanced past entries still buffered by a profile."""
+        self.config["profiles"] = [
+            {"name": "fast"},
+            {"name": "slow", "collect-timeout": 3600, "pushover": {"user": "slow_user"}},
+        ]
+        self.run_daemon([[make_entry(0, "Disk failure")], []])
+
+        # Only the fast profile has sent, the slow one still buffers the entry
+        self.assertEqual([user for _, user, _ in self.sent], ["test_user"])
+        self.assertIsNone(load_cursor(self.cursor_file))
+
+    def test_run_daemon_resume(self):
+        """Test resuming from a saved cursor sends a digest of the backlog first."""
+        save_cursor(self.cursor_file, "cursor-0")
+        self.run_daemon(
+            [
+                [make_entry(1, "Disk failure"), make_entry(2, "Disk failure")],
+                [make_entry(3, "Connection lost")],
+            ]
+        )
+
+        self.assertEqual(len(self.sent), 2)
+        self.assertTrue(self.sent[0][0].startswith("Catch-up: 2 entries, 1 distinct messages"))
+        self.assertTrue(self.sent[1][0].endswith("Connection lost"))
+        self.assertEqual(load_cursor(self.cursor_file), "cursor-3")
+
+    def test_run_daemon_signal_during_catch_up(self):
+        """Test SIGUSR1 during catch-up writes a snapshot instead of terminating."""
+        save_cursor(self.cursor_file, "cursor-0")
+        handlers = {}
+
+        def backlog():
+            handlers[signal.SIGUSR1](signal.SIGUSR1, None)
+            yield make_entry(1, "Disk failure")
+
+        with patch("signal.signal", side_effect=handlers.__setitem__):
+            with patch("sys.stderr") as mock_stderr:
+                self.run_daemon([backlog()])
+
+        written = "".join(args[0] for args, _ in mock_stderr.write.call_args_list)
+        self.assertEqual(json.loads(written)["profiles"][0]["history_size"], 1)
+        self.assertTrue(self.sent[0][0].startswith("Catch-up: 1 entries"))
 
 
 if __name__ == "__main__":
@@ -1,29 +1,30 @@
 #!/usr/bin/env python3
 """Tests for the history cleanup functionality."""
 
+import re
 import unittest
-from datetime import datetime, timedelta
 from unittest.mock import patch
 
-from pushlog_lib import cleanup_history
+from pushlog_lib import Unit, cleanup_history, cleanup_shards
 
 
 class TestHistoryCleanup(unittest.TestCase):
     """Test cases for the history buffer cleanup functionality."""
     def setUp(self):
         # Create a history buffer with entries of various ages
-        self.now = datetime.now()
+        # Timestamps are monotonic clock readings in seconds
+        self.now = 100000.0
         self.history = {
-            "recent_message": self.now - timedelta(minutes=5),  # 5 minutes old
-            "old_message": self.now - timedelta(minutes=40),  # 40 minutes old
-            "very_old_message": self.now - timedelta(hours=2),  # 2 hours old
+            "recent_message": self.now - 5 * 60,  # 5 minutes old
+            "old_message": self.now - 40 * 60,  # 40 minutes old
+            "very_old_message": self.now - 2 * 3600,  # 2 hours old
         }
 
-    @patch("pushlog_lib.datetime")
-    def test_cleanup_history(self, mock_datetime):
+    @patch("pushlog_lib.time")
+    def test_cleanup_history(self, mock_time):
         """Test cleaning up old entries from the history buffer."""
-        # Mock the datetime.now() call to return a fixed time
-        mock_datetime.now.return_value = self.now
+        # Mock the time.monotonic() call to return a fixed time
+        mock_time.monotonic.return_value = self.now
 
         # Set the deduplication window to 30 minutes
         deduplication_window = 30
@@ -39,11 +40,11 @@ class TestHistoryCleanup(unittest.TestCase):
         # Check that we have only one message left
         self.assertEqual(len(self.history), 1)
 
-    @patch("pushlog_lib.datetime")
-    def test_cleanup_history_larger_window(self, mock_datetime):
+    @patch("pushlog_lib.time")
+    def test_cleanup_history_larger_window(self, mock_time):
         """Test cleaning up with a larger deduplication window."""
-        # Mock the datetime.now() call to return a fixed time
-        mock_datetime.now.return_value = self.now
+        # Mock the time.monotonic() call to return a fixed time
+        mock_time.monotonic.return_value = self.now
 
         # Set the deduplication window to 60 minutes
         deduplication_window = 60
@@ -59,11 +60,11 @@ class TestHistoryCleanup(unittest.TestCase):
         # Check that we have two messages left
         self.assertEqual(len(self.history), 2)
 
-    @patch("pushlog_lib.datetime")
-    def test_cleanup_history_empty(self, mock_datetime):
+    @patch("pushlog_lib.time")
+    def test_cleanup_history_empty(self, mock_time):
         """Test cleaning up an empty history buffer."""
-        # Mock the datetime.now() call to return a fixed time
-        mock_datetime.now.return_value = self.now
+        # Mock the time.monotonic() call to return a fixed time
+        mock_time.monotonic.return_value = self.now
 
         # Create an empty history buffer
         empty_history = {}
@@ -77,6 +78,29 @@ class TestHistoryCleanup(unittest.TestCase):
         # Check that the history is still empty
         self.assertEqual(len(empty_history), 0)
 
+    @patch("pushlog_lib.time")
+    def test_cleanup_shards(self, mock_time):
+        """Test cleaning up per-unit history shards with per-unit windows."""
+        mock_time.monotonic.return_value = self.now
+        units = [
+            Unit(re.compile("noisy"), [3], [], [], deduplication_window=60),
+            Unit(re.compile(".*"), [3], [], []),
+        ]
+        history = {
+            "noisy.service": dict(self.history),
+            "other.service": dict(self.history),
+            "stale.service": {"very_old_message": self.now - 2 * 3600},
+        }
+
+        cleanup_shards(history, units, 30)
+
+        # The noisy unit keeps messages for its longer window
+        self.assertEqual(sorted(history["noisy.service"]), ["old_message", "recent_message"])
+        self.assertEqual(sorted(history["other.service"]), ["recent_message"])
+
+        # Empty shards are dropped
+        self.assertNotIn("stale.service", history)
+
 
 if __name__ == "__main__":
     unittest.main()
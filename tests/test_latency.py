@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Tests for the alert latency tracking functionality."""
+
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from pushlog_lib import Histogram, LatencyTracker, journal_lag, to_record
+
+
+class TestLatency(unittest.TestCase):
+    """Test cases for latency histograms, slow log and metrics export."""
+    def setUp(self):
+        # Sample journal entry
+        self.entry = {
+            "_SYSTEMD_UNIT": "test-unit.service",
+            "SYSLOG_IDENTIFIER": "test-process",
+            "__REALTIME_TIMESTAMP": datetime.now(),
+            "PRIORITY": 3,
+            "MESSAGE": "This is a test message",
+        }
+
+    def test_histogram(self):
+        """Test bucketing of observations."""
+        histogram = Histogram((1, 5))
+        for value in (0.5, 1, 3, 10):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.count, 4)
+        self.assertEqual(histogram.sum, 14.5)
+        self.assertEqual(histogram.cumulative(), [(1, 2), (5, 3), ("+Inf", 4)])
+
+    def test_journal_lag(self):
+        """Test computing how long ago an entry was written."""
+        self.entry["__REALTIME_TIMESTAMP"] = datetime.now() - timedelta(seconds=30)
+        self.assertAlmostEqual(journal_lag(self.entry), 30, delta=1)
+
+        # Entries without a timestamp count as current
+        del self.entry["__REALTIME_TIMESTAMP"]
+        self.assertEqual(journal_lag(self.entry), 0.0)
+
+    def test_record_batch(self):
+        """Test per-stage accounting of a flushed batch."""
+        tracker = LatencyTracker()
+        records = [to_record(self.entry, lag=0.5, filter_time=0.01, accepted=100.0)]
+
+        tracker.record_batch(records, 105.0, 0.2)
+
+        self.assertEqual(tracker.histograms["journal_lag"].sum, 0.5)
+        self.assertEqual(tracker.histograms["filter"].sum, 0.01)
+        self.assertEqual(tracker.histograms["batch_wait"].sum, 5.0)
+        self.assertEqual(tracker.histograms["send"].sum, 0.2)
+        self.assertAlmostEqual(tracker.histograms["total"].sum, 5.71)
+
+    def test_slow_log(self):
+        """Test that only entries above the threshold are written to the slow log."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            slow_log = os.path.join(temp_dir, "slow.log")
+            tracker = LatencyTracker(slow_threshold=3, slow_log=slow_log)
+            records = [
+                to_record(self.entry, lag=0.1, filter_time=0.0, accepted=104.0),
+                to_record(self.entry, lag=0.1, filter_time=0.0, accepted=100.0),
+            ]
+
+            tracker.record_batch(records, 105.0, 0.5)
+
+            with open(slow_log, "r", encoding="utf-8") as slow_file:
+                lines = slow_file.readlines()
+        self.assertEqual(len(lines), 1)
+        item = json.loads(lines[0])
+        self.assertEqual(item["unit"], "test-unit.service")
+        self.assertEqual(item["batch_wait"], 5.0)
+        self.assertEqual(item["total"], 5.6)
+
+    def test_slow_log_stderr(self):
+        """Test that the slow log defaults to stderr."""
+        tracker = LatencyTracker(slow_threshold=0)
+        with patch("sys.stderr") as mock_stderr:
+            tracker.record_batch([to_record(self.entry, accepted=0.0)], 1.0, 0.0)
+        mock_stderr.write.assert_called_once()
+
+    def test_write_metrics(self):
+        """Test exporting histograms and the journal lag gauge."""
+        tracker = LatencyTracker()
+        tracker.journal_lag = 1.5
+        tracker.record_batch([to_record(self.entry, accepted=0.0)], 2.0, 0.0)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            metrics_file = os.path.join(temp_dir, "pushlog.prom")
+            tracker.write_metrics(metrics_file)
+            with open(metrics_file, "r", encoding="utf-8") as prom_file:
+                metrics = prom_file.read()
+
+        self.assertIn('pushlog_latency_seconds_bucket{stage="batch_wait",le="2.5"} 1', metrics)
+        self.assertIn('pushlog_latency_seconds_bucket{stage="batch_wait",le="1"} 0', metrics)
+        self.assertIn('pushlog_latency_seconds_count{stage="total"} 1', metrics)
+        self.assertIn("pushlog_journal_lag_seconds 1.5", metrics)
+
+
+if __name__ == "__main__":
+    unittest.main()
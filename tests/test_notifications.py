@@ -6,7 +6,7 @@ from datetime import datetime
 from unittest.mock import MagicMock, patch
 
 from pushlog_lib import (format_message, send_collected_messages,
-                         send_pushover_notification)
+                         send_pushover_notification, to_record)
 
 
 class TestNotifications(unittest.TestCase):
@@ -40,7 +40,7 @@ class TestNotifications(unittest.TestCase):
 
     def test_format_message(self):
         """Test formatting a journal entry for display."""
-        formatted = format_message(self.entry)
+        formatted = format_message(to_record(self.entry))
 
         # Check that the formatted message contains all the key components
         self.assertIn(str(self.entry["__REALTIME_TIMESTAMP"]), formatted)
@@ -51,7 +51,7 @@ class TestNotifications(unittest.TestCase):
     @patch("pushlog_lib.send_pushover_notification")
     def test_send_collected_messages(self, mock_send_notification):
         """Test sending collected messages."""
-        entries = [self.entry]
+        entries = [to_record(self.entry)]
 
         # Call the function
         send_collected_messages(entries, self.pushover_config)
@@ -72,7 +72,7 @@ class TestNotifications(unittest.TestCase):
     @patch("pushlog_lib.send_pushover_notification")
     def test_send_collected_messages_custom_sender(self, mock_default_sender):
         """Test sending collected messages with a custom notification sender."""
-        entries = [self.entry]
+        entries = [to_record(self.entry)]
 
         # Create a mock custom sender
         mock_custom_sender = MagicMock()
@@ -96,6 +96,19 @@ class TestNotifications(unittest.TestCase):
         # Check that the priority was passed correctly
         self.assertEqual(args[2], 3)
 
+    def test_to_record(self):
+        """Test reducing a journal entry to a compact record."""
+        entry = dict(self.entry, _PID=1234, _HOSTNAME="host", _BOOT_ID="abc")
+        record = to_record(entry)
+
+        # Only the fields used for notifications are kept
+        self.assertEqual(record.unit, "test-unit.service")
+        self.assertEqual(record.identifier, "test-process")
+        self.assertEqual(record.timestamp, self.entry["__REALTIME_TIMESTAMP"])
+        self.assertEqual(record.priority, 3)
+        self.assertEqual(record.message, "This is a test message")
+        self.assertFalse(hasattr(record, "__dict__"))
+
     @patch("http.client.HTTPSConnection")
     def test_send_pushover_notification(self, mock_https_connection):
         """Test sending a notification to Pushover."""
@@ -107,10 +120,11 @@ class TestNotifications(unittest.TestCase):
         mock_https_connection.return_value = mock_connection
 
         # Call the function
-        send_pushover_notification("Test message", self.pushover_config, 3)
+        status = send_pushover_notification("Test message", self.pushover_config, 3)
+        self.assertEqual(status, 200)
 
         # Check that the connection was created correctly
-        mock_https_connection.assert_called_once_with("api.pushover.net:443")
+        mock_https_connection.assert_called_once_with("api.pushover.net:443", timeout=10)
 
         # Check that the request was made correctly
         mock_connection.request.assert_called_once()
@@ -127,6 +141,24 @@ class TestNotifications(unittest.TestCase):
         self.assertIn("title=Test+Logs", args[2])
         self.assertIn("priority=0", args[2])  # Priority 3 maps to 0
 
+    @patch("http.client.HTTPConnection")
+    def test_send_pushover_notification_url(self, mock_http_connection):
+        """Test sending to an overridden API endpoint."""
+        mock_response = MagicMock()
+        mock_response.status = 200
+        mock_connection = MagicMock()
+        mock_connection.getresponse.return_value = mock_response
+        mock_http_connection.return_value = mock_connection
+        self.pushover_config["url"] = "http://127.0.0.1:8080/pushover/"
+
+        status = send_pushover_notification("Test message", self.pushover_config, 3)
+
+        self.assertEqual(status, 200)
+        mock_http_connection.assert_called_once_with("127.0.0.1:8080", timeout=10)
+        args, _ = mock_connection.request.call_args
+        self.assertEqual(args[1], "/pushover/1/messages.json")
+        self.assertNotIn("url=", args[2])
+
     @patch("http.client.HTTPSConnection")
     def test_send_pushover_notification_error(self, mock_https_connection):
         """Test error handling when sending a notification to Pushover."""
@@ -140,10 +172,11 @@ class TestNotifications(unittest.TestCase):
 
         # Call the function (should not raise an exception)
         with patch("sys.stderr") as mock_stderr:
-            send_pushover_notification("Test message", self.pushover_config, 3)
+            status = send_pushover_notification("Test message", self.pushover_config, 3)
 
         # Check that the error was reported
         mock_stderr.write.assert_called()
+        self.assertEqual(status, 400)
 
     @patch("http.client.HTTPSConnection")
     def test_send_pushover_notification_exception(self, mock_https_connection):
@@ -153,10 +186,11 @@ class TestNotifications(unittest.TestCase):
 
         # Call the function (should not raise an exception)
         with patch("sys.stderr") as mock_stderr:
-            send_pushover_notification("Test message", self.pushover_config, 3)
+            status = send_pushover_notification("Test message", self.pushover_config, 3)
 
         # Check that the error was reported
         mock_stderr.write.assert_called()
+        self.assertIsNone(status)
 
 
 if __name__ == "__main__":
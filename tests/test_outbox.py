@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Tests for the durable notification outbox."""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from pushlog_lib import (PUSHOVER_MESSAGE_LIMIT, LatencyTracker, Outbox,
+                         Profile, to_record)
+
+
+class TestOutbox(unittest.TestCase):
+    """Test cases for queueing, retrying and bounding the outbox."""
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.temp_dir.name, "outbox.jsonl")
+        self.pushovers = {"ops": {"token": "test_token", "user": "test_user"}}
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_deliver(self):
+        """Test that delivered notifications are removed."""
+        outbox = Outbox(self.path, interval=0)
+        outbox.sender("ops")("Test message", self.pushovers["ops"], 3)
+        mock_sender = MagicMock(return_value=200)
+
+        self.assertTrue(outbox.drain(self.pushovers, mock_sender))
+
+        mock_sender.assert_called_once_with("Test message", self.pushovers["ops"], 3)
+        self.assertEqual(len(outbox.pending), 0)
+        self.assertEqual(len(Outbox(self.path).pending), 0)
+
+    def test_survives_restart(self):
+        """Test that undelivered notifications are reloaded from disk."""
+        outbox = Outbox(self.path)
+        outbox.enqueue("ops", "First", 3)
+        outbox.enqueue("ops", "Second", 4)
+        outbox.file.close()
+
+        reloaded = Outbox(self.path)
+        self.assertEqual([item["message"] for item in reloaded.pending], ["First", "Second"])
+        reloaded.enqueue("ops", "Third")
+        self.assertEqual(reloaded.pending[-1]["id"], 2)
+
+    def test_retry_with_backoff(self):
+        """Test that failed deliveries are kept and retried after a backoff."""
+        outbox = Outbox(self.path, interval=1)
+        outbox.enqueue("ops", "Test message", 3)
+
+        with patch("pushlog_lib.time.monotonic", return_value=1000.0):
+            self.assertFalse(outbox.drain(self.pushovers, MagicMock(return_value=None)))
+            self.assertEqual(len(outbox.pending), 1)
+            self.assertEqual(outbox.next_send, 1005.0)
+
+            # Not due yet
+            mock_sender = MagicMock(return_value=200)
+            self.assertFalse(outbox.drain(self.pushovers, mock_sender))
+            mock_sender.assert_not_called()
+
+        # Rate limited, back off further
+        with patch("pushlog_lib.time.monotonic", return_value=1005.0):
+            self.assertFalse(outbox.drain(self.pushovers, MagicMock(return_value=429)))
+            self.assertEqual(outbox.next_send, 1015.0)
+
+        with patch("pushlog_lib.time.monotonic", return_value=1015.0):
+            self.assertTrue(outbox.drain(self.pushovers, mock_sender))
+        self.assertEqual(len(outbox.pending), 0)
+        self.assertEqual(outbox.backoff, 0.0)
+
+    def test_pacing(self):
+        """Test that only the backlog of a failed delivery is paced."""
+        self.pushovers["db"] = {"token": "test_token", "user": "db_user"}
+        outbox = Outbox(self.path, interval=1)
+        mock_sender = MagicMock(return_value=200)
+
+        def enqueue(count):
+            # Alternating profiles, so nothing is coalesced
+            for i in range(count):
+                outbox.enqueue(("ops", "db")[i % 2], f"Message {i}")
+
+        with patch("pushlog_lib.time.monotonic", return_value=1000.0):
+            enqueue(3)
+            self.assertEqual(outbox.drain(self.pushovers, mock_sender), 3)
+            enqueue(3)
+            self.assertEqual(outbox.drain(self.pushovers, mock_sender, budget=2), 2)
+            self.assertEqual(outbox.drain(self.pushovers, mock_sender), 1)
+
+            enqueue(2)
+            self.assertEqual(outbox.drain(self.pushovers, MagicMock(return_value=503)), 0)
+            enqueue(1)
+
+        # The two notifications queued when delivery failed are sent once per interval
+        with patch("pushlog_lib.time.monotonic", return_value=1005.0):
+            self.assertEqual(outbox.drain(self.pushovers, mock_sender), 1)
+            self.assertEqual(outbox.drain(self.pushovers, mock_sender), 0)
+        with patch("pushlog_lib.time.monotonic", return_value=1006.0):
+            self.assertEqual(outbox.drain(self.pushovers, mock_sender), 2)
+        self.assertEqual(len(outbox.pending), 0)
+        self.assertEqual(mock_sender.call_count, 9)
+
+    def test_permanent_error(self):
+        """Test that notifications rejected by the API are not retried."""
+        outbox = Outbox(self.path, interval=0)
+        outbox.enqueue("ops", "Test message", 3)
+
+        self.assertFalse(outbox.drain(self.pushovers, MagicMock(return_value=400)))
+        self.assertEqual(len(outbox.pending), 0)
+
+    def test_coalesce(self):
+        """Test merging queued notifications of a profile up to the message limit."""
+        self.pushovers["db"] = {"token": "test_token", "user": "db_user"}
+        outbox = Outbox(self.path, interval=0)
+        outbox.enqueue("ops", "First", 4)
+        outbox.enqueue("ops", "Second", 2)
+        outbox.enqueue("ops", "x" * 1020)
+        outbox.enqueue("db", "Third", 3)
+        mock_sender = MagicMock(return_value=200)
+
+        while outbox.drain(self.pushovers, mock_sender):
+            pass
+
+        self.assertEqual(
+            [args for args, _ in mock_sender.call_args_list],
+            [
+                ("First\nSecond", self.pushovers["ops"], 2),
+                ("x" * 1020, self.pushovers["ops"], None),
+                ("Third", self.pushovers["db"], 3),
+            ],
+        )
+
+    def test_split_oversized(self):
+        """Test that notifications over the message limit are split at line boundaries."""
+        outbox = Outbox(self.path, interval=0)
+        lines = [f"{i:02d} " + "x" * 97 for i in range(30)]
+        outbox.enqueue("ops", "\n".join(lines), 3)
+        outbox.enqueue("ops", "y" * 2500)
+
+        messages = [item["message"] for item in outbox.pending]
+        self.assertTrue(all(len(message) <= PUSHOVER_MESSAGE_LIMIT for message in messages))
+        self.assertEqual("\n".join(messages[:3]).split("\n"), lines)
+        self.assertEqual(len(messages[0].split("\n")), 10)
+        self.assertEqual("".join(messages[3:]), "y" * 2500)
+
+        mock_sender = MagicMock(return_value=200)
+        while outbox.drain(self.pushovers, mock_sender):
+            pass
+        self.assertEqual(mock_sender.call_count, 6)
+        self.assertTrue(
+            all(len(args[0]) <= PUSHOVER_MESSAGE_LIMIT for args, _ in mock_sender.call_args_list)
+        )
+
+    def test_write_error(self):
+        """Test that notifications are sent directly if the outbox cannot be written."""
+        outbox = Outbox(self.path, interval=0)
+        mock_fallback = MagicMock(return_value=200)
+        with patch("pushlog_lib.os.fsync", side_effect=OSError(28, "No space left on device")):
+            with patch("sys.stderr"):
+                outbox.sender("ops", mock_fallback)("Test message", self.pushovers["ops"], 3)
+
+        mock_fallback.assert_called_once_with("Test message", self.pushovers["ops"], 3)
+        self.assertEqual(len(outbox.pending), 0)
+
+        # Later notifications are queued again once the outbox is writable
+        outbox.enqueue("ops", "Second message")
+        self.assertEqual([item["message"] for item in Outbox(self.path).pending][-1:],
+                         ["Second message"])
+
+    def test_latency_on_delivery(self):
+        """Test that send latency is recorded when Pushover accepted a notification."""
+        outbox = Outbox(self.path, interval=0)
+        latency = LatencyTracker()
+        profile = Profile("ops", [], 5, 30, 95, self.pushovers["ops"])
+        entry = {"_SYSTEMD_UNIT": "test-unit.service", "PRIORITY": 3, "MESSAGE": "Test"}
+        with patch("pushlog_lib.time.monotonic", return_value=100.0):
+            profile.add(to_record(entry))
+            profile.add(to_record(entry))
+        with patch("pushlog_lib.time.monotonic", return_value=105.0):
+            profile.flush(None, latency, outbox)
+
+        # Queued, not delivered yet
+        self.assertEqual(latency.histograms["send"].count, 0)
+        self.assertEqual(len(outbox.pending), 1)
+        with patch("pushlog_lib.time.monotonic", return_value=110.0):
+            outbox.drain(self.pushovers, MagicMock(return_value=500), latency)
+        self.assertEqual(latency.histograms["send"].count, 0)
+
+        with patch("pushlog_lib.time.monotonic", return_value=200.0):
+            self.assertTrue(outbox.drain(self.pushovers, MagicMock(return_value=200), latency))
+        self.assertEqual(latency.histograms["batch_wait"].sum, 10.0)
+        self.assertEqual(latency.histograms["send"].count, 2)
+        self.assertEqual(latency.histograms["send"].sum, 190.0)
+
+    def test_max_size(self):
+        """Test that the oldest notifications are dropped when the outbox is full."""
+        outbox = Outbox(self.path, max_size=1)
+        with patch("sys.stderr"):
+            for i in range(20):
+                outbox.enqueue("ops", f"{i:03d} " + "x" * 100)
+
+        self.assertLessEqual(outbox.pending_bytes, 1024)
+        self.assertEqual(outbox.pending[-1]["message"][:3], "019")
+        self.assertEqual(len(Outbox(self.path).pending), len(outbox.pending))
+
+    def test_retention(self):
+        """Test that notifications older than the retention are dropped."""
+        outbox = Outbox(self.path, retention=10)
+        with patch("pushlog_lib.time.time", return_value=1000.0):
+            outbox.enqueue("ops", "Old message")
+
+        mock_sender = MagicMock(return_value=200)
+        with patch("sys.stderr"):
+            self.assertFalse(outbox.drain(self.pushovers, mock_sender))
+        mock_sender.assert_not_called()
+        self.assertEqual(len(outbox.pending), 0)
+
+    def test_compaction(self):
+        """Test that acknowledged notifications do not grow the file forever."""
+        outbox = Outbox(self.path, interval=0)
+        mock_sender = MagicMock(return_value=200)
+        for _ in range(500):
+            outbox.enqueue("ops", "x" * 200)
+            outbox.drain(self.pushovers, mock_sender)
+
+        self.assertLess(os.path.getsize(self.path), 2 * 64 * 1024)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -230,6 +230,60 @@ class TestPatternMatching(unittest.TestCase):
             should_process_entry(entry2, self.units, self.fuzzy_threshold, self.history)
         )
 
+    def test_fuzzy_deduplication_per_unit(self):
+        """Test that similar messages from different units do not suppress each other."""
+        self.units[0] = self.units[0]._replace(match=re.compile("test-unit|other-test-unit"))
+        entry1 = {
+            "_SYSTEMD_UNIT": "test-unit.service",
+            "PRIORITY": 3,
+            "MESSAGE": "Error A12: Connection failed",
+        }
+        entry2 = {
+            "_SYSTEMD_UNIT": "other-test-unit.service",
+            "PRIORITY": 3,
+            "MESSAGE": "Error A12: Connection failed",
+        }
+
+        self.assertTrue(
+            should_process_entry(entry1, self.units, self.fuzzy_threshold, self.history)
+        )
+        self.assertTrue(
+            should_process_entry(entry2, self.units, self.fuzzy_threshold, self.history)
+        )
+
+        # Each unit has its own history shard
+        self.assertEqual(
+            sorted(self.history), ["other-test-unit.service", "test-unit.service"]
+        )
+
+    def test_fuzzy_threshold_unit_override(self):
+        """Test per-unit fuzzy threshold and deduplication window overrides."""
+        entry1 = {
+            "_SYSTEMD_UNIT": "test-unit.service",
+            "PRIORITY": 3,
+            "MESSAGE": "Error A12: Connection failed",
+        }
+        entry2 = {
+            "_SYSTEMD_UNIT": "test-unit.service",
+            "PRIORITY": 3,
+            "MESSAGE": "Error B12: Connection failed",
+        }
+
+        # A stricter unit threshold lets the similar message through
+        self.units[0] = self.units[0]._replace(fuzzy_threshold=99)
+        self.assertTrue(
+            should_process_entry(entry1, self.units, self.fuzzy_threshold, self.history)
+        )
+        self.assertTrue(
+            should_process_entry(entry2, self.units, self.fuzzy_threshold, self.history)
+        )
+
+        # A window of 0 disables deduplication for the unit
+        self.units[0] = self.units[0]._replace(fuzzy_threshold=None, deduplication_window=0)
+        self.assertTrue(
+            should_process_entry(entry1, self.units, self.fuzzy_threshold, self.history)
+        )
+
     def test_fuzzy_threshold_disabled(self):
         """Test when fuzzy matching is disabled (threshold=100)."""
         # First entry
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""Tests for following several journal sources at once."""
+
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+import systemd.journal
+
+import pushlog_lib
+from pushlog_lib import (SOURCE_FIELD, MultiReader, Profile, Unit, catch_up,
+                         cleanup_shards, cursor_path, format_message,
+                         load_config, open_journal, open_sources, parse_sources,
+                         to_record)
+
+# Writes journal files from the journal export format
+JOURNAL_REMOTE = next(
+    (
+        path
+        for path in (
+            shutil.which("systemd-journal-remote"),
+            "/usr/lib/systemd/systemd-journal-remote",
+            "/lib/systemd/systemd-journal-remote",
+        )
+        if path and os.access(path, os.X_OK)
+    ),
+    None,
+)
+
+
+class FakeReader:
+    """Stand-in for a systemd.journal.Reader following one journal."""
+
+    def __init__(self, entries=()):
+        self.entries = list(entries)
+        self.read_fd, self.write_fd = os.pipe()
+        self.changed = False
+
+    def close(self):
+        """Close the wakeup pipe."""
+        os.close(self.read_fd)
+        os.close(self.write_fd)
+
+    def append(self, entry):
+        """Add an entry and wake up poll(), like journald appending to the file."""
+        self.entries.append(entry)
+        self.changed = True
+        os.write(self.write_fd, b"x")
+
+    def fileno(self):
+        """File descriptor to poll for changes."""
+        return self.read_fd
+
+    def get_events(self):
+        """Events to poll for."""
+        return 1  # POLLIN
+
+    def get_timeout_ms(self):
+        """Maximum time to poll, -1 for no limit."""
+        return -1
+
+    def process(self):
+        """Consume the wakeup, returns APPEND if entries were added."""
+        if not self.changed:
+            return systemd.journal.NOP
+        self.changed = False
+        os.read(self.read_fd, 1024)
+        return systemd.journal.APPEND
+
+    def get_next(self):
+        """Next entry, or an empty dict at the end of the journal."""
+        return self.entries.pop(0) if self.entries else {}
+
+
+def make_entry(i, unit="web.service", message="Disk failure"):
+    """Build a journal entry with a cursor."""
+    return {
+        "__CURSOR": f"cursor-{i}",
+        "__REALTIME_TIMESTAMP": f"2026-10-19 12:00:{i:02d}",
+        "_SYSTEMD_UNIT": unit,
+        "SYSLOG_IDENTIFIER": "app",
+        "PRIORITY": 3,
+        "MESSAGE": message,
+    }
+
+
+class TestSources(unittest.TestCase):
+    """Test cases for multi-source ingestion."""
+
+    def setUp(self):
+        self.units = [Unit(re.compile("web"), [0, 1, 2, 3], [], [])]
+        self.readers = {
+            "web1": FakeReader([make_entry(0), make_entry(1)]),
+            "web2": FakeReader([make_entry(0)]),
+        }
+        self.reader = MultiReader(self.readers)
+
+    def tearDown(self):
+        for reader in self.readers.values():
+            reader.close()
+
+    def test_load_config_sources(self):
+        """Test source names default to the journal directory name."""
+        config = load_config(
+            os.path.join(os.path.dirname(__file__), "fixtures", "test_profiles.yaml")
+        )
+
+        self.assertEqual([s["name"] for s in config["sources"]], ["web1", "db1", "web2"])
+        self.assertEqual(config["sources"][0]["directory"], "/var/log/journal/remote/web1")
+        self.assertEqual(len(config["sources"][1]["files"]), 2)
+        self.assertIsNone(config["sources"][1]["directory"])
+
+    def test_invalid_sources(self):
+        """Test sources that cannot be told apart or lack a journal are rejected."""
+        for sources in (
+            # Default names clash
+            [{"directory": "/a/host1"}, {"directory": "/b/host1/"}],
+            [{"name": "web", "directory": "/a"}, {"name": "web", "files": ["/b.journal"]}],
+            # Not usable as a cursor file suffix
+            [{"name": "../web", "directory": "/a"}],
+            [{"name": "web.tmp", "directory": "/a"}],
+            [{"name": "web"}],
+            [{"name": "web", "directory": "/a", "files": ["/b.journal"]}],
+        ):
+            with self.assertRaises(SystemExit), patch("sys.stderr"):
+                parse_sources(sources)
+
+        self.assertEqual(
+            [s["name"] for s in parse_sources([{"directory": "/a/host1"}, {"files": ["/b"]}])],
+            ["host1", "source-1"],
+        )
+
+    def test_multi_reader(self):
+        """Test reading all sources and tagging entries with their source."""
+        self.assertEqual(self.reader.wait(1), systemd.journal.APPEND)
+        entries = list(self.reader)
+
+        self.assertEqual(
+            [(e[SOURCE_FIELD], e["__CURSOR"]) for e in entries],
+            [("web1", "cursor-0"), ("web1", "cursor-1"), ("web2", "cursor-0")],
+        )
+
+        # Drained sources only become ready again when their journal changes
+        self.assertEqual(self.reader.wait(0.01), systemd.journal.NOP)
+        self.readers["web2"].append(make_entry(1))
+        self.assertEqual(self.reader.wait(1), systemd.journal.APPEND)
+        self.assertEqual([e[SOURCE_FIELD] for e in self.reader], ["web2"])
+
+    def test_open_sources_missing(self):
+        """Test a source that cannot be opened yet is left out, then added once it exists."""
+        sources = {
+            source["name"]: source
+            for source in parse_sources(
+                [{"directory": "/var/log/journal/remote/web1"}, {"directory": "/missing/web3"}]
+            )
+        }
+
+        def fake_open_journal(since, cursor, directory, files):  # pylint: disable=unused-argument
+            if directory.startswith("/missing"):
+                raise FileNotFoundError(2, "No such file or directory")
+            return self.readers["web1"]
+
+        with patch.object(pushlog_lib, "open_journal", side_effect=fake_open_journal):
+            with patch("sys.stderr") as mock_stderr:
+                readers = open_sources(sources, {})
+        self.assertEqual(list(readers), ["web1"])
+        written = "".join(args[0] for args, _ in mock_stderr.write.call_args_list)
+        self.assertIn("Cannot open source 'web3'", written)
+
+        reader = MultiReader(readers)
+        self.assertEqual(len(list(reader)), 2)
+        reader.add("web3", self.readers["web2"])
+        self.assertEqual(reader.wait(0), systemd.journal.APPEND)
+        self.assertEqual([e[SOURCE_FIELD] for e in reader], ["web3"])
+
+    @patch.object(pushlog_lib, "BATCH_SIZE", 2)
+    def test_multi_reader_interleaves(self):
+        """Test a busy source does not starve the others."""
+        for i in range(2, 6):
+            self.readers["web1"].entries.append(make_entry(i))
+        self.reader.wait(1)
+        sources = [e[SOURCE_FIELD] for e in self.reader]
+
+        self.assertEqual(sources[:3], ["web1", "web1", "web2"])
+        self.assertEqual(sources.count("web1"), 6)
+
+    def test_format_message_host(self):
+        """Test entries from sources name their host."""
+        self.reader.wait(1)
+        entries = list(self.reader)
+        entries[0]["_HOSTNAME"] = "web1.example.org"
+
+        self.assertEqual(
+            format_message(to_record(entries[0])),
+            "2026-10-19 12:00:00 web1.example.org web.service[app]: Disk failure",
+        )
+        # Without _HOSTNAME, the source name stands in
+        self.assertEqual(
+            format_message(to_record(entries[2])),
+            "2026-10-19 12:00:00 web2 web.service[app]: Disk failure",
+        )
+        # The local journal keeps the plain format
+        self.assertEqual(
+            format_message(to_record(make_entry(0))),
+            "2026-10-19 12:00:00 web.service[app]: Disk failure",
+        )
+
+    def test_deduplication_per_source(self):
+        """Test the same message from different hosts is not deduplicated."""
+        profile = Profile("default", self.units, 5, 30, 95, {})
+        self.reader.wait(1)
+        verdicts = profile.process_batch(list(self.reader))
+
+        # The repeat on web1 is a duplicate, the same message on web2 is not
+        self.assertEqual(verdicts, [True, False, True])
+        self.assertEqual(
+            set(profile.history_buffer), {("web1", "web.service"), ("web2", "web.service")}
+        )
+
+        cleanup_shards(profile.history_buffer, self.units, 30)
+        self.assertEqual(len(profile.history_buffer), 2)
+
+    def test_catch_up_cursors(self):
+        """Test catch-up returns the last cursor of each source."""
+        profile = Profile("default", self.units, 5, 30, 95, {})
+        self.reader.wait(1)
+        (digest,), cursors = catch_up(self.reader, [profile])
+
+        self.assertEqual(cursors, {"web1": "cursor-1", "web2": "cursor-0"})
+        self.assertEqual(sorted(group[0] for group in digest), [1, 2])
+
+    def test_cursor_path(self):
+        """Test each source gets its own cursor file."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cursor_file = os.path.join(temp_dir, "cursor")
+            self.assertEqual(cursor_path(cursor_file), cursor_file)
+            self.assertEqual(cursor_path(cursor_file, "web1"), f"{cursor_file}.web1")
+
+
+def export_entries(host, messages):
+    """Entries in the journal export format, as read by systemd-journal-remote."""
+    boot_id = "0123456789abcdef0123456789abcdef"
+    return "".join(
+        f"__REALTIME_TIMESTAMP={1760000000000000 + i * 1000000}\n"
+        f"__MONOTONIC_TIMESTAMP={1000000 + i * 1000000}\n"
+        f"_BOOT_ID={boot_id}\n"
+        f"_HOSTNAME={host}\n"
+        "_SYSTEMD_UNIT=web.service\n"
+        "SYSLOG_IDENTIFIER=app\n"
+        "PRIORITY=3\n"
+        f"MESSAGE={message}\n"
+        "\n"
+        for i, message in enumerate(messages)
+    )
+
+
+@unittest.skipUnless(
+    hasattr(systemd.journal, "_Reader") and JOURNAL_REMOTE,
+    "needs python-systemd and systemd-journal-remote",
+)
+class TestJournalFiles(unittest.TestCase):
+    """Test cases reading real journal files written by systemd-journal-remote."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.directories = {}
+        for host, messages in (("web1", ["Disk failure", "Fan failure"]), ("web2", ["Boot"])):
+            directory = os.path.join(self.temp_dir.name, host)
+            os.mkdir(directory)
+            subprocess.run(
+                [
+                    JOURNAL_REMOTE,
+                    "--split-mode=none",
+                    f"--output={os.path.join(directory, 'remote.journal')}",
+                    "-",
+                ],
+                input=export_entries(f"{host}.example.org", messages).encode(),
+                check=True,
+                capture_output=True,
+            )
+            self.directories[host] = directory
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_open_journal_files(self):
+        """Test reading a journal file from a point in time."""
+        path = os.path.join(self.directories["web1"], "remote.journal")
+        journal = open_journal(since=datetime(2020, 1, 1), files=[path])
+
+        messages = [entry["MESSAGE"] for entry in iter(journal)]
+        self.assertEqual(messages, ["Disk failure", "Fan failure"])
+
+    def test_multi_reader_directories(self):
+        """Test following several journal directories."""
+        reader = MultiReader(
+            {
+                host: open_journal(since=datetime(2020, 1, 1), directory=directory)
+                for host, directory in self.directories.items()
+            }
+        )
+        self.assertEqual(reader.wait(0), systemd.journal.APPEND)
+        entries = list(reader)
+
+        self.assertEqual(
+            [(entry[SOURCE_FIELD], entry["MESSAGE"]) for entry in entries],
+            [("web1", "Disk failure"), ("web1", "Fan failure"), ("web2", "Boot")],
+        )
+        self.assertIn(
+            "web2.example.org web.service[app]: Boot", format_message(to_record(entries[2]))
+        )
+
+        # Opened at the tail by default, only new entries are read
+        reader = MultiReader({"web1": open_journal(directory=self.directories["web1"])})
+        self.assertEqual(list(reader), [])
+
+    def test_open_sources_missing(self):
+        """Test a journal directory that does not exist yet is left out."""
+        sources = {
+            source["name"]: source
+            for source in parse_sources(
+                [
+                    {"directory": self.directories["web1"]},
+                    {"directory": os.path.join(self.temp_dir.name, "web3")},
+                ]
+            )
+        }
+        with patch("sys.stderr"):
+            readers = open_sources(sources, {}, since=datetime(2020, 1, 1))
+
+        self.assertEqual(list(readers), ["web1"])
+
+
+if __name__ == "__main__":
+    unittest.main()